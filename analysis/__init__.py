@@ -1,5 +1,27 @@
-from .motif import Motif, load_motifs
-from .ensemble import Disjunction, Count, MostSpecific, MajorityVote, ensemble_from_string
-from .utility import load_prc, load_ground_truth
-from .active import Active
-from .evaluation import performance_statistics, prc
\ No newline at end of file
+from importlib import import_module
+
+# public names, and the modules providing them - each module is imported on first use,
+# so e.g. pandas is only loaded by the plotting path that needs load_prc
+EXPORTS = {
+    'Motif' : '.motif', 'Row' : '.motif', 'load_motifs' : '.motif', 'iter_motifs' : '.motif', 'unique_motifs' : '.motif',
+    'Interner' : '.interner', 'INTERNER' : '.interner',
+    'Ensemble' : '.ensemble', 'Disjunction' : '.ensemble', 'Count' : '.ensemble', 'MostSpecific' : '.ensemble',
+    'MajorityVote' : '.ensemble', 'ensemble_from_string' : '.ensemble',
+    'load_prc' : '.utility', 'load_prcs' : '.utility', 'load_ground_truth' : '.utility',
+    'Active' : '.active',
+    'evaluate_motifs' : '.sql',
+    'StreamingImage' : '.stream', 'iter_records' : '.stream', 'read_stream' : '.stream',
+    'performance_statistics' : '.evaluation', 'prc' : '.evaluation', 'prc_curve' : '.evaluation', 'PRCurve' : '.evaluation'
+}
+
+__all__ = list(EXPORTS.keys())
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -0,0 +1,37 @@
+import json, sys, time
+from argparse import ArgumentParser
+from .experiment import MODES, job_of_json, job_of_string, run_jobs
+from .instrument import enable
+
+# run many evaluation experiments at once, loading each image and ground truth once per process
+# jobs are given as mode=...,ensemble=...,image=...,ground-truth=...,output=...[,learning-steps=...][,summary=true,curve=...]
+# (with commas and backslashes in values escaped by a backslash) or as a json list of objects with the same keys
+parser = ArgumentParser(prog="python -m analysis")
+parser.add_argument("--job", action="append", default=[], help=f"a job, as comma-separated key=value pairs, \\ escaping commas in values (modes: {', '.join(MODES)})")
+parser.add_argument("--job-file", default=None, help="a json list of jobs")
+parser.add_argument("--jobs", type=int, default=1, help="number of worker processes")
+parser.add_argument("--no-cache", action="store_true", help="don't compile images to memory-mappable caches first")
+parser.add_argument("--profile", nargs="?", const=True, default=None)
+
+# main
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    # record per-stage timings, writing the trace to the given path (if any)
+    if args.profile is not None:
+        enable(output=None if args.profile is True else args.profile)
+
+    try:
+        jobs = [job_of_string(job) for job in args.job]
+    except (ValueError, KeyError) as e:
+        parser.error(f"bad --job: {e}")
+    if args.job_file is not None:
+        with open(args.job_file, 'r') as f:
+            jobs.extend(job_of_json(job) for job in json.load(f))
+    if not jobs:
+        parser.error("no jobs given, use --job or --job-file")
+
+    start = time.perf_counter()
+    for job in run_jobs(jobs, processes=args.jobs, compile=not args.no_cache):
+        print(f"Finished {job.mode} with {job.ensemble} on {job.image} -> {job.output}", file=sys.stderr)
+    print(f"Ran {len(jobs)} job(s) in {time.perf_counter() - start:.2f}s with {args.jobs} process(es).", file=sys.stderr)
@@ -1,4 +1,6 @@
 from math import log2, inf
+from .instrument import instrumented
+from .interner import INTERNER
 
 # summand term to keep entropy well-defined
 def entropy_summand(p):
@@ -6,43 +8,102 @@ def entropy_summand(p):
     else:
         return (-1 * p * log2(p))
 
+# entropy of a value included in some number of the groups
+def count_entropy(included, total):
+    p_i = included / total
+    p_e = (total - included) / total
+    return entropy_summand(p_i) + entropy_summand(p_e)
+
 # simple entropy
 def entropy(value, groups):
-    included, excluded = 0, 0
+    included = 0
     for group in groups:
         if value in group: included += 1
-        else: excluded += 1
-    p_i = included / len(groups)
-    p_e = excluded / len(groups)
-    return entropy_summand(p_i) + entropy_summand(p_e)
+    return count_entropy(included, len(groups))
 
-# compute the maximum entropy value over a set of groups
-def maximal_entropy(values, groups):
-    m, m_e = None, -inf
+# how many groups include each value, from one pass over the group images
+def inclusion_counts(groups):
+    counts = {}
+    for group in groups:
+        for value in group.domain():
+            counts[value] = counts.get(value, 0) + 1
+    return counts
+
+# shift the counts from one set of groups to another, given what was removed and added
+def update_counts(counts, removed, added):
+    counts = dict(counts)
+    for group in removed:
+        for value in group.domain():
+            if counts[value] == 1: del counts[value]
+            else: counts[value] -= 1
+    for group in added:
+        for value in group.domain():
+            counts[value] = counts.get(value, 0) + 1
+    return counts
+
+# compute the maximum entropy value from inclusion counts over some number of groups - ties go to the value
+# with the smallest key, if given, and otherwise to whichever comes first
+def maximal_count_entropy(values, counts, total, key=None):
+    m, m_e, m_key = None, -inf, None
     # check each possible value
     for v in values:
-        v_e = entropy(v, groups)
+        v_e = count_entropy(counts.get(v, 0), total)
         if v_e > m_e:
-            m, m_e = v, v_e
+            m, m_e, m_key = v, v_e, None
+        elif v_e == m_e and key is not None:
+            # keys are only worked out once there's a tie to break
+            if m_key is None: m_key = key(m)
+            v_key = key(v)
+            if v_key < m_key:
+                m, m_key = v, v_key
     # return the maximal element and the associated entropy
     return m, m_e
 
+# compute the maximum entropy value over a set of groups
+def maximal_entropy(values, groups):
+    if not groups: return maximal_count_entropy(values, {}, 1)
+    return maximal_count_entropy(values, inclusion_counts(groups), len(groups))
+
 class Active:
-    def __init__(self, ensemble):
+    def __init__(self, ensemble, counts=None):
         self.ensemble = ensemble
         self.motifs = self.ensemble.motifs
-    
-    def candidate_split(self, frontier=False):
+        # inclusion counts, keyed by whether they're over the frontier or not
+        self._counts = {} if counts is None else counts
+
+    def groups(self, frontier=False):
         if frontier:
-            relevant_motifs = self.ensemble._frontier
+            return self.ensemble._frontier
         else:
-            relevant_motifs = self.ensemble.motifs
-        possibilities = self.ensemble.domain()
-        split, _ = maximal_entropy(possibilities, relevant_motifs)
+            return self.ensemble.motifs
+
+    def counts(self, frontier=False):
+        if frontier not in self._counts:
+            self._counts[frontier] = inclusion_counts(self.groups(frontier=frontier))
+        return self._counts[frontier]
+
+    @instrumented('candidate_split')
+    def candidate_split(self, frontier=False):
+        relevant_motifs = self.groups(frontier=frontier)
+        counts = self.counts(frontier=frontier)
+        # every value in the domain is included in at least one relevant motif - ties break on the smallest
+        # (file, identifier), not on where a value happens to sit in the counts, so splits don't depend on history
+        split, _ = maximal_count_entropy(counts.keys(), counts, len(relevant_motifs), key=INTERNER.lookup)
         return split
     
+    @instrumented('split_on')
     def split_on(self, value, ground_truth_value):
         def pred(motif): 
             return (value in motif) == ground_truth_value
         ensemble = self.ensemble.filter(pred)
-        return self.__class__(ensemble)
\ No newline at end of file
+        # carry the counts over by only touching the motifs that changed
+        split = self.__class__(ensemble)
+        for frontier, counts in self._counts.items():
+            old, new = self.groups(frontier=frontier), split.groups(frontier=frontier)
+            kept = set(new)
+            removed = [motif for motif in old if motif not in kept]
+            if len(removed) < len(new):
+                kept = set(old)
+                added = [motif for motif in new if motif not in kept]
+                split._counts[frontier] = update_counts(counts, removed, added)
+        return split
@@ -0,0 +1,179 @@
+import hashlib, json, mmap, os, struct, sys
+from array import array
+from .motif import Motif, Row, iter_json_list
+
+# compiled images live next to their source, and carry enough of it to tell when they're stale
+CACHE_SUFFIX = '.cache'
+MAGIC = b'MOTIFIMG'
+VERSION = 1
+# magic, version, source size, source mtime, source sha256, the section sizes, and a reserved field
+HEADER = struct.Struct('<8sQqq32sQQQQQQ')
+
+# layout: header | file table (json) | motif metadata (json) | motif offsets | row files | row offsets | values
+# every section is padded to 8 bytes, and every integer array is little-endian int64
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+def content_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 24), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def is_cache(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def padding(size):
+    return b'\0' * (-size % 8)
+
+def little_endian(values):
+    if sys.byteorder != 'little': values.byteswap()
+    return values
+
+# compile an image json file into the columnar binary format
+def compile_image(filename, output=None):
+    if output is None: output = cache_path(filename)
+    stat = os.stat(filename)
+    files, file_indices, metadata = [], {}, []
+    motif_offsets, row_files, row_offsets, values = array('q', [0]), array('q'), array('q', [0]), array('q')
+    with open(filename, 'r') as f:
+        for motif in iter_json_list(f):
+            metadata.append(motif['motif'])
+            for row in motif['images']:
+                if row['file'] not in file_indices:
+                    file_indices[row['file']] = len(files)
+                    files.append(row['file'])
+                row_files.append(file_indices[row['file']])
+                values.extend(sorted(set(row['image'])))
+                row_offsets.append(len(values))
+            motif_offsets.append(len(row_files))
+    file_table = json.dumps(files).encode('utf-8')
+    motif_table = json.dumps(metadata).encode('utf-8')
+    header = HEADER.pack(
+        MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, content_hash(filename),
+        len(file_table), len(motif_table), len(metadata), len(row_files), len(values), 0
+    )
+    # write somewhere else first, so a half-written cache is never picked up
+    temporary = output + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        for section in (file_table, motif_table):
+            f.write(section)
+            f.write(padding(len(section)))
+        for section in (motif_offsets, row_files, row_offsets, values):
+            little_endian(section).tofile(f)
+    os.replace(temporary, output)
+    return output
+
+# a memory-mapped compiled image
+class CompiledImage:
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.source_size, self.source_mtime, self.source_hash,
+            file_table, motif_table, motifs, rows, values, _) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a compiled image this version can read")
+        size = HEADER.size + sum(n + (-n % 8) for n in (file_table, motif_table)) + 8 * (motifs + 2 * rows + values + 2)
+        if len(self._map) < size:
+            raise ValueError(f"{filename} is truncated")
+        # carve the sections out of the map without copying
+        view, offset = memoryview(self._map), HEADER.size
+        def section(size):
+            nonlocal offset
+            start, offset = offset, offset + size + (-size % 8)
+            return view[start:start + size]
+        self.files = json.loads(bytes(section(file_table)))
+        self.metadata = json.loads(bytes(section(motif_table)))
+        self.motif_offsets = self.integers(section(8 * (motifs + 1)))
+        self.row_files = self.integers(section(8 * rows))
+        self.row_offsets = self.integers(section(8 * (rows + 1)))
+        self.values = self.integers(section(8 * values))
+
+    def integers(self, view):
+        view = view.cast('q')
+        # big-endian hosts pay for a copy
+        if sys.byteorder != 'little':
+            return little_endian(array('q', view))
+        return view
+
+    # does the cache still describe the source file
+    def matches(self, source):
+        stat = os.stat(source)
+        if stat.st_size != self.source_size: return False
+        if stat.st_mtime_ns == self.source_mtime: return True
+        return content_hash(source) == self.source_hash
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def motif(self, index):
+        rows = []
+        for row in range(self.motif_offsets[index], self.motif_offsets[index + 1]):
+            image = self.values[self.row_offsets[row]:self.row_offsets[row + 1]]
+            rows.append(Row(self.files[self.row_files[row]], image))
+        return Motif(self.metadata[index], rows)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.motif(index)
+
+# open the compiled form of an image, rebuilding the cache if it has gone stale - None if there's no cache
+def open_cache(filename):
+    if is_cache(filename):
+        return CompiledImage(filename)
+    path = cache_path(filename)
+    if not os.path.exists(path):
+        return None
+    try:
+        image = CompiledImage(path)
+        if image.matches(filename): return image
+    except (ValueError, struct.error):
+        # written by another version, or cut short - either way it's rebuilt like a stale one
+        pass
+    compile_image(filename, path)
+    return CompiledImage(path)
+
+# columnar form of motifs already in memory, as used by saved ensembles
+def pack_motifs(motifs):
+    files, file_indices, metadata = [], {}, []
+    motif_offsets, row_files, row_offsets, values = array('q', [0]), array('q'), array('q', [0]), array('q')
+    multiplicities = array('q')
+    for motif in motifs:
+        metadata.append(motif.motif)
+        multiplicities.append(motif.multiplicity)
+        for row in motif.rows:
+            if row.file not in file_indices:
+                file_indices[row.file] = len(files)
+                files.append(row.file)
+            row_files.append(file_indices[row.file])
+            values.extend(row.image)
+            row_offsets.append(len(values))
+        motif_offsets.append(len(row_files))
+    return {
+        'files' : files,
+        'metadata' : metadata,
+        'multiplicities' : multiplicities.tobytes(),
+        'motif_offsets' : motif_offsets.tobytes(),
+        'row_files' : row_files.tobytes(),
+        'row_offsets' : row_offsets.tobytes(),
+        'values' : values.tobytes()
+    }
+
+def unpack_motifs(packed):
+    arrays = {}
+    for name in ('multiplicities', 'motif_offsets', 'row_files', 'row_offsets', 'values'):
+        arrays[name] = array('q')
+        arrays[name].frombytes(packed[name])
+    files, motif_offsets, row_files, row_offsets, values = (packed['files'], arrays['motif_offsets'],
+        arrays['row_files'], arrays['row_offsets'], memoryview(arrays['values']))
+    motifs = []
+    for index, metadata in enumerate(packed['metadata']):
+        rows = []
+        for row in range(motif_offsets[index], motif_offsets[index + 1]):
+            rows.append(Row(files[row_files[row]], values[row_offsets[row]:row_offsets[row + 1]]))
+        motifs.append(Motif(metadata, rows, multiplicity=arrays['multiplicities'][index]))
+    return motifs
@@ -1,5 +1,6 @@
+from .ensemble import Ensemble, RankingEnsemble
 from .disjunction import Disjunction, Count
-from .voting import MajorityVote, MostSpecific
+from .voting import MajorityVote, MostSpecific, WeightedVote, multiplicity
 
 ENSEMBLES = {
     'disjunction' : Disjunction,
@@ -8,8 +9,17 @@ ENSEMBLES = {
     'most-specific' : MostSpecific
 }
 
-from difflib import get_close_matches
-
+# exact names skip the fuzzy match entirely
 def ensemble_from_string(string):
+    if string in ENSEMBLES:
+        return ENSEMBLES[string]
+    from difflib import get_close_matches
     candidates = get_close_matches(string, ENSEMBLES.keys(), n=1)
     return ENSEMBLES[candidates[0]]
+
+# the matrix backend pulls in numpy and scipy, so it's only imported when asked for
+def __getattr__(name):
+    if name == 'IncidenceMatrix':
+        from .matrix import IncidenceMatrix
+        return IncidenceMatrix
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,132 @@
+import json, zipfile
+from array import array
+import numpy as np
+from ..cache import content_hash, pack_motifs, unpack_motifs
+from ..interner import INTERNER
+from .frontier import Lattice
+from .disjunction import Disjunction, Count
+from .voting import MajorityVote, MostSpecific, WeightedVote, multiplicity
+
+# artifacts are plain data - a json header and int64/float64 arrays in an .npz - never pickled objects, so loading
+# one can't run code, and the ensemble is rebuilt through its constructor rather than from its saved attributes
+FORMAT = 'ensemble'
+VERSION = 2
+CLASSES = {
+    'disjunction' : Disjunction,
+    'count' : Count,
+    'majority-vote' : MajorityVote,
+    'most-specific' : MostSpecific,
+    'weighted-vote' : WeightedVote
+}
+# weighted votes can only be saved with a weight we can name
+WEIGHTS = {'multiplicity' : multiplicity}
+
+def int64s(values):
+    return np.frombuffer(values, dtype=np.int64) if isinstance(values, bytes) else np.asarray(values, dtype=np.int64)
+
+# compressed-sparse encoding of a mapping from motifs to lists of motifs, by position
+def pack_relation(relation, positions):
+    offsets, targets = array('q', [0]), array('q')
+    sources = array('q')
+    for source, others in relation.items():
+        if source not in positions: continue
+        sources.append(positions[source])
+        targets.extend(positions[other] for other in others if other in positions)
+        offsets.append(len(targets))
+    return int64s(sources), int64s(offsets), int64s(targets)
+
+def unpack_relation(packed, motifs):
+    sources, offsets, targets = (column.tolist() for column in packed)
+    return {
+        motifs[source] : [motifs[target] for target in targets[offsets[i]:offsets[i + 1]]]
+        for i, source in enumerate(sources)
+    }
+
+# value index as a file table position and identifier per value, plus the capturing motifs' positions
+def pack_index(value_index, positions, files):
+    file_positions = {file : i for i, file in enumerate(files)}
+    value_files, identifiers, offsets, targets = array('q'), array('q'), array('q', [0]), array('q')
+    for value, motifs in value_index.items():
+        filename, identifier = INTERNER.lookup(value)
+        value_files.append(file_positions[filename])
+        identifiers.append(identifier)
+        targets.extend(positions[motif] for motif in motifs)
+        offsets.append(len(targets))
+    return int64s(value_files), int64s(identifiers), int64s(offsets), int64s(targets)
+
+def unpack_index(packed, motifs, files):
+    value_files, identifiers, offsets, targets = (column.tolist() for column in packed)
+    file_indices = [INTERNER.file(file) for file in files]
+    result = {}
+    for i in range(len(identifiers)):
+        value = INTERNER.intern_all(file_indices[value_files[i]], (identifiers[i],))[0]
+        result[value] = [motifs[target] for target in targets[offsets[i]:offsets[i + 1]]]
+    return result
+
+MOTIF_ARRAYS = ('multiplicities', 'motif_offsets', 'row_files', 'row_offsets', 'values')
+INDEX_ARRAYS = ('index_files', 'index_identifiers', 'index_offsets', 'index_targets')
+RELATION_ARRAYS = ('sources', 'offsets', 'targets')
+
+def save_ensemble(ensemble, path, source=None):
+    names = {cls : name for name, cls in CLASSES.items()}
+    if type(ensemble) not in names:
+        raise ValueError(f"can't save a {type(ensemble).__name__} ensemble")
+    header = {'format' : FORMAT, 'version' : VERSION, 'class' : names[type(ensemble)]}
+    if isinstance(ensemble, WeightedVote):
+        weights = {weight : name for name, weight in WEIGHTS.items()}
+        if ensemble._weight not in weights:
+            raise ValueError(f"can't save a weighted vote weighted by {ensemble._weight!r}")
+        header['weight'] = weights[ensemble._weight]
+
+    positions = {motif : i for i, motif in enumerate(ensemble.motifs)}
+    packed = pack_motifs(ensemble.motifs)
+    header.update({
+        'source' : None if source is None else content_hash(source).hex(),
+        'files' : packed['files'],
+        'metadata' : packed['metadata']
+    })
+    arrays = {name : int64s(packed[name]) for name in MOTIF_ARRAYS}
+    arrays.update(zip(INDEX_ARRAYS, pack_index(ensemble._index, positions, packed['files'])))
+    # ranking ensembles also carry the lattice and the confidence vector
+    if hasattr(ensemble, '_lattice'):
+        lattice = ensemble._lattice
+        arrays['frontier'] = int64s([positions[motif] for motif in lattice.frontier])
+        for name, relation in zip(('dominators', 'dominated'), lattice.relations(ensemble.motifs)):
+            arrays.update(zip((f"{name}_{column}" for column in RELATION_ARRAYS), pack_relation(relation, positions)))
+        arrays['confidences'] = np.asarray(ensemble.confidence_vector(), dtype=np.float64)
+    header = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+    # written through a file object, so numpy doesn't add a suffix to the path
+    with open(path, 'wb') as f:
+        np.savez(f, header=header, **arrays)
+
+def load_ensemble(path, source=None):
+    try:
+        with np.load(path, allow_pickle=False) as artifact:
+            header = json.loads(artifact['header'].tobytes().decode('utf-8'))
+            arrays = {name : artifact[name] for name in artifact.files if name != 'header'}
+    except (ValueError, KeyError, zipfile.BadZipFile) as e:
+        raise ValueError(f"{path} is not an ensemble artifact ({e})")
+    if header.get('format') != FORMAT or header.get('version') != VERSION:
+        raise ValueError(f"{path} was saved by an incompatible version")
+    if source is not None and header['source'] != content_hash(source).hex():
+        raise ValueError(f"{path} is stale - {source} has changed since it was saved")
+
+    packed = {name : arrays[name].tobytes() for name in MOTIF_ARRAYS}
+    packed.update(files=header['files'], metadata=header['metadata'])
+    motifs = unpack_motifs(packed)
+    options = {'value_index' : unpack_index([arrays[name] for name in INDEX_ARRAYS], motifs, header['files'])}
+    if 'frontier' in arrays:
+        # the frontier index is rebuilt over the frontier, so its lists come out in frontier order
+        options['lattice'] = Lattice(
+            [motifs[i] for i in arrays['frontier'].tolist()],
+            unpack_relation([arrays[f"dominators_{column}"] for column in RELATION_ARRAYS], motifs),
+            unpack_relation([arrays[f"dominated_{column}"] for column in RELATION_ARRAYS], motifs)
+        )
+    cls = CLASSES[header['class']]
+    if cls is WeightedVote:
+        ensemble = cls(motifs, WEIGHTS[header['weight']], **options)
+    else:
+        ensemble = cls(motifs, **options)
+    if 'confidences' in arrays:
+        ensemble._confidences[False] = arrays['confidences']
+    return ensemble
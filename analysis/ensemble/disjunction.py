@@ -2,10 +2,13 @@ from .ensemble import Ensemble, RankingEnsemble
 
 class Disjunction(Ensemble):
     def classify(self, value):
-        for motif in self.motifs:
-            if value in motif: return True
-        return False
+        return len(self.capturing(value)) > 0
 
+# each motif votes once for every motif with the same image it stands in for
 class Count(RankingEnsemble):
     def confidence(self, motif):
-        return 1
\ No newline at end of file
+        return motif.multiplicity
+
+    def confidences(self, motifs):
+        import numpy as np
+        return np.fromiter((motif.multiplicity for motif in motifs), dtype=np.float64, count=len(motifs))
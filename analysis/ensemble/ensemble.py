@@ -1,9 +1,16 @@
-from .frontier import frontier
+from heapq import heappush, heapreplace
+from .frontier import Lattice
+from ..instrument import instrumented
+from .index import index, derive_index
 
 # ensemble base class
 class Ensemble:
-    def __init__(self, motifs):
+    def __init__(self, motifs, value_index=None):
         self.motifs = motifs
+        # built once (or handed over, already built), so membership checks only touch motifs containing the value
+        if value_index is None:
+            value_index = index(motifs)
+        self._index = value_index
     
     def classify(self, value):
         raise NotImplementedError
@@ -12,50 +19,147 @@ class Ensemble:
         return self.classify(value)
 
     def filter(self, pred):
-        motifs = filter(pred, self.filter_candidates())
-        return self.__class__(list(motifs))
+        motifs = list(filter(pred, self.filter_candidates()))
+        return self.rebuild(motifs, value_index=self.restrict_index(motifs))
+
+    # the index over some of our motifs, derived from ours rather than rebuilt
+    def restrict_index(self, motifs):
+        kept = set(motifs)
+        removed = [motif for motif in self.motifs if motif not in kept]
+        return derive_index(self._index, motifs, removed)
+
+    # construct an ensemble of the same kind over different motifs
+    def rebuild(self, motifs, **kwargs):
+        return self.__class__(motifs, **kwargs)
 
     def domain(self):
-        result = set()
-        for motif in self.motifs:
-            result.update(motif.domain())
-        return result
+        return set(self._index.keys())
     
     def filter_candidates(self):
         return self.motifs
 
+    # the motifs capturing a value
+    def capturing(self, value, frontier=False):
+        return self._index.get(value, ())
+
     @property
     def size(self):
         return len(self.motifs)
 
+    # write the ensemble to a single artifact, keyed to the image it was built from
+    def save(self, path, source=None):
+        from .artifact import save_ensemble
+        save_ensemble(self, path, source=source)
+
+    # read an ensemble back, checking it against the image it was built from
+    @staticmethod
+    def load(path, source=None):
+        from .artifact import load_ensemble
+        return load_ensemble(path, source=source)
+
 # ranking ensemble provides a ranking function and a threshold
 class RankingEnsemble(Ensemble):
-    def __init__(self, motifs, default_threshold=0.0):
+    def __init__(self, motifs, default_threshold=0.0, lattice=None, value_index=None):
         self._default_threshold = default_threshold
-        self._frontier = frontier(motifs)
-        super().__init__(motifs)
+        if lattice is None:
+            lattice = Lattice.of_motifs(motifs)
+        self._lattice = lattice
+        self._frontier = lattice.frontier
+        self._frontier_index = lattice.frontier_index
+        self._matrices = {}
+        self._confidences = {}
+        self._buckets = {}
+        super().__init__(motifs, value_index=value_index)
+
+    # derive the frontier of the survivors, and both indexes, from ours instead of recomputing them
+    def filter(self, pred):
+        motifs = list(filter(pred, self.filter_candidates()))
+        return self.rebuild(motifs, lattice=self._lattice.restrict(motifs), value_index=self.restrict_index(motifs))
 
     def domain(self):
-        result = set()
-        for motif in self._frontier:
-            result.update(motif.domain())
-        return result
+        return set(self._frontier_index.keys())
+
+    def capturing(self, value, frontier=False):
+        if frontier:
+            return self._frontier_index.get(value, ())
+        else:
+            return self._index.get(value, ())
 
     def confidence(self, motif):
         raise NotImplementedError
 
+    # per-motif confidences, aligned with the given motifs
+    def confidences(self, motifs):
+        return [self.confidence(motif) for motif in motifs]
+
+    def relevant(self, frontier=False):
+        return self._frontier if frontier else self.motifs
+
+    # confidences of the relevant motifs, computed once
+    def confidence_vector(self, frontier=False):
+        if frontier not in self._confidences:
+            import numpy as np
+            self._confidences[frontier] = np.asarray(self.confidences(self.relevant(frontier=frontier)), dtype=np.float64)
+        return self._confidences[frontier]
+
+    # incidence matrix over the relevant motifs, built on first use
+    def incidence(self, frontier=False):
+        if frontier not in self._matrices:
+            if frontier:
+                self._matrices[frontier] = self.incidence().restrict(self._frontier)
+            else:
+                from .matrix import IncidenceMatrix
+                self._matrices[frontier] = IncidenceMatrix(self.motifs)
+        return self._matrices[frontier]
+
+    @instrumented('rank')
     def rank(self, value, frontier=False):
         result = 0.0
-        if frontier:
-            relevant = self._frontier
-        else:
-            relevant = self.motifs
-        for motif in relevant:
-            if value in motif:
-                result += self.confidence(motif)
+        for motif in self.capturing(value, frontier=frontier):
+            result += self.confidence(motif)
         return result
 
+    # rank every value at once, returning aligned arrays of values and scores
+    @instrumented('rank_all')
+    def rank_all(self, frontier=False):
+        matrix = self.incidence(frontier=frontier)
+        return matrix.values, matrix.scores(self.confidence_vector(frontier=frontier))
+
+    # values grouped by how many relevant motifs capture them, largest groups first, along with the largest confidence
+    def buckets(self, frontier=False):
+        if frontier not in self._buckets:
+            groups = {}
+            for value, motifs in (self._frontier_index if frontier else self._index).items():
+                if len(motifs) in groups:
+                    groups[len(motifs)].append(value)
+                else:
+                    groups[len(motifs)] = [value]
+            confidences = self.confidence_vector(frontier=frontier)
+            largest = float(confidences.max()) if len(confidences) > 0 else 0.0
+            # bounds only hold when no motif can pull a score down
+            bounded = len(confidences) == 0 or confidences.min() >= 0
+            self._buckets[frontier] = (sorted(groups.items(), reverse=True), largest, bounded)
+        return self._buckets[frontier]
+
+    # the k highest-ranked values and their rankings, best first, without ranking the whole domain
+    # ties go to the larger value, as they would sorting every (ranking, value) pair
+    @instrumented('top_k')
+    def top_k(self, k, frontier=False):
+        if k <= 0: return []
+        buckets, largest, bounded = self.buckets(frontier=frontier)
+        heap = []
+        for count, values in buckets:
+            # no value in this or any later group can rank above count * largest (or tie with the worst kept)
+            if bounded and len(heap) == k and count * largest < heap[0][0]: break
+            for value in values:
+                ranking = self.rank(value, frontier=frontier)
+                if len(heap) < k:
+                    heappush(heap, (ranking, value))
+                elif (ranking, value) > heap[0]:
+                    heapreplace(heap, (ranking, value))
+        return [(value, ranking) for ranking, value in sorted(heap, reverse=True)]
+
     def classify(self, value, threshold=None, frontier=False):
         if threshold is None:
             threshold = self._default_threshold
-        return self.rank(value, frontier=frontier) > threshold
\ No newline at end of file
+        return self.rank(value, frontier=frontier) > threshold
@@ -1,22 +1,149 @@
+from ..instrument import instrumented
+from .index import index as index_motifs, derive_index
+
 # motif partial order captured by subset inclusion on motif domain
 def leq(left, right):
     return left.domain().issubset(right.domain())
 def lt(left, right):
     return leq(left, right) and not left.domain() == right.domain()
 
+# posting lists from each value to the indexed motifs whose domain contains it
+class SubsetIndex:
+    def __init__(self):
+        self.motifs = []
+        self._postings = {}
+
+    def add(self, motif):
+        self.motifs.append(motif)
+        for value in motif.domain():
+            if value in self._postings:
+                self._postings[value].append(motif)
+            else:
+                self._postings[value] = [motif]
+
+    # indexed motifs whose domain strictly contains the given domain
+    def supersets(self, domain):
+        # every strict superset contains each value, so only the rarest value's postings need checking
+        candidates = None
+        for value in domain:
+            motifs = self._postings.get(value)
+            if motifs is None: return
+            if candidates is None or len(motifs) < len(candidates):
+                candidates = motifs
+        # the empty domain sits below any non-empty one
+        if candidates is None:
+            candidates = self.motifs
+        for other in candidates:
+            if len(other.domain()) > len(domain) and domain.issubset(other.domain()):
+                yield other
+
+    def dominates(self, domain):
+        return next(self.supersets(domain), None) is not None
+
+# visiting by decreasing size means any strict superset is already decided
+def by_size(motifs):
+    return sorted(motifs, key=lambda m: len(m.domain()), reverse=True)
+
 # compute the frontier
+@instrumented('frontier')
 def frontier(motifs):
-    # sorting helsp improve performance
-    motifs = sorted(motifs, key=lambda m: len(m.domain()), reverse=True)
-    results = []
-    # check each canddiate
-    for motif in motifs:
-        ok = True
-        for other in motifs:
-            if motif.domain() != other.domain():
-                if lt(motif, other):
-                    ok = False
-                    break
-        if ok:
-            results.append(motif)
-    return results
\ No newline at end of file
+    index = SubsetIndex()
+    for motif in by_size(motifs):
+        if not index.dominates(motif.domain()):
+            index.add(motif)
+    return index.motifs
+
+# the frontier, along with which frontier motifs dominate every other motif - the frontier is in by_size order,
+# ties kept in the order of the motifs, and each frontier index list in frontier order
+class Lattice:
+    def __init__(self, frontier, dominators, dominated, frontier_index=None, owned=False):
+        self.frontier = frontier
+        # value -> frontier motifs capturing it
+        if frontier_index is None:
+            frontier_index = index_motifs(frontier)
+        self.frontier_index = frontier_index
+        # non-frontier motif -> frontier motifs strictly containing it
+        self._dominators = dominators
+        # frontier motif -> motifs it (possibly once) dominated
+        self._dominated = dominated
+        # whether nothing else can reach the two relations above, so restricting can update them in place
+        self._owned = owned
+
+    @classmethod
+    @instrumented('frontier')
+    def of_motifs(cls, motifs):
+        index, dominators, dominated = SubsetIndex(), {}, {}
+        for motif in by_size(motifs):
+            above = list(index.supersets(motif.domain()))
+            if above:
+                dominators[motif] = above
+                for other in above:
+                    dominated[other].append(motif)
+            else:
+                index.add(motif)
+                dominated[motif] = []
+        # the subset index's postings are already an index over the frontier
+        return cls(index.motifs, dominators, dominated, frontier_index=index._postings)
+
+    # the relations, for writing out - a lattice that's handed them on to a restriction has to rebuild them
+    def relations(self, motifs):
+        if self._dominators is None:
+            return self.of_motifs(motifs).relations(motifs)
+        return self._dominators, self._dominated
+
+    # lattice over a subset of the motifs (in the same order), touching only motifs below a removed frontier motif
+    # a lattice built from motifs may be shared - by ensembles a server keeps warm, say - so its first restriction
+    # copies the relations, but a restricted lattice is only reachable through its ensemble, and hands its
+    # relations on to its own restriction rather than copying them again (restricting it twice rebuilds)
+    @instrumented('frontier')
+    def restrict(self, motifs):
+        if self._dominators is None:
+            return self.of_motifs(motifs)
+        if self._owned:
+            dominators, dominated = self._dominators, self._dominated
+            self._dominators, self._dominated = None, None
+        else:
+            dominators, dominated = dict(self._dominators), dict(self._dominated)
+        position = {motif : i for i, motif in enumerate(motifs)}
+        kept, removed, lost = [], [], []
+        for motif in self.frontier:
+            if motif in position: kept.append(motif)
+            else:
+                removed.append(motif)
+                lost.append(dominated.pop(motif))
+        # surviving motifs that lost at least one dominator
+        affected, seen = [], set()
+        for below in lost:
+            for other in below:
+                if other in position and other not in seen:
+                    seen.add(other)
+                    affected.append(other)
+                    dominators[other] = [d for d in dominators[other] if d in position]
+        # those left with no dominator are exactly the ones that may be promoted
+        candidates = [motif for motif in affected if not dominators[motif]]
+        index = SubsetIndex()
+        for motif in by_size(candidates):
+            if not index.dominates(motif.domain()):
+                index.add(motif)
+                del dominators[motif]
+                dominated[motif] = []
+        # promoted motifs may dominate anything that lost a dominator
+        for motif in affected:
+            if motif in dominators:
+                above = list(index.supersets(motif.domain()))
+                if above:
+                    dominators[motif] = dominators[motif] + above
+                for other in above:
+                    dominated[other].append(motif)
+        # prune entries for removed motifs once they outnumber the survivors
+        if len(dominators) > len(motifs):
+            for motif in list(dominators.keys()):
+                if motif not in position: del dominators[motif]
+        # the order a rebuild would give - kept motifs are already in it, promoted ones slot in by position
+        frontier = kept
+        if index.motifs:
+            frontier = sorted(kept + index.motifs, key=lambda motif: (-len(motif.domain()), position[motif]))
+        return self.__class__(
+            frontier, dominators, dominated,
+            frontier_index=derive_index(self.frontier_index, frontier, removed, index.motifs), owned=True
+        )
@@ -0,0 +1,41 @@
+# inverted index mapping each value to the motifs that capture it
+def index(motifs):
+    result = {}
+    for motif in motifs:
+        for value in motif.domain():
+            if value in result:
+                result[value].append(motif)
+            else:
+                result[value] = [motif]
+    return result
+
+# the index over motifs, derived from an index over the motifs they came from by dropping the removed motifs
+# and adding the added ones - only values those motifs capture are touched, and lists keep the order of motifs
+# (when the change is bigger than what's left, indexing the motifs from scratch is less work)
+def derive_index(value_index, motifs, removed, added=()):
+    if len(removed) + len(added) >= len(motifs):
+        return index(motifs)
+    result = dict(value_index)
+    lost, gained = index(removed), index(added)
+    if gained:
+        position = {motif : i for i, motif in enumerate(motifs)}
+    for value in lost.keys() | gained.keys():
+        capturing = value_index.get(value, [])
+        if value in lost:
+            # a value rarely loses more than a few of its motifs, and removing those one at a time stays in c
+            if len(lost[value]) == len(capturing):
+                capturing = []
+            elif len(lost[value]) <= 8:
+                capturing = list(capturing)
+                for motif in lost[value]:
+                    capturing.remove(motif)
+            else:
+                dropped = set(lost[value])
+                capturing = [motif for motif in capturing if motif not in dropped]
+        if value in gained:
+            capturing = sorted(capturing + gained[value], key=position.__getitem__)
+        if capturing:
+            result[value] = capturing
+        else:
+            del result[value]
+    return result
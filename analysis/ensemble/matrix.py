@@ -0,0 +1,44 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# sparse motif-by-value incidence matrix, one row per motif and one column per value
+class IncidenceMatrix:
+    def __init__(self, motifs):
+        self.motifs = motifs
+        # assign every value a column
+        columns = {}
+        indptr, indices = [0], []
+        for motif in motifs:
+            for value in motif.domain():
+                if value not in columns:
+                    columns[value] = len(columns)
+                indices.append(columns[value])
+            indptr.append(len(indices))
+        self.values = np.fromiter(columns.keys(), dtype=np.int64, count=len(columns))
+        self.matrix = csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(motifs), len(columns))
+        )
+        self._rows = {id(motif) : row for row, motif in enumerate(motifs)}
+
+    # restrict to a subset of the motifs, keeping the columns aligned
+    def restrict(self, motifs):
+        rows = np.array([self._rows[id(motif)] for motif in motifs], dtype=np.int64)
+        result = self.__class__.__new__(self.__class__)
+        result.motifs = motifs
+        result.values = self.values
+        result.matrix = self.matrix[rows]
+        result._rows = {id(motif) : row for row, motif in enumerate(motifs)}
+        return result
+
+    # number of values captured by each motif
+    def sizes(self):
+        return np.diff(self.matrix.indptr)
+
+    # score every value as the sum of the confidences of the motifs capturing it
+    def scores(self, confidence):
+        return self.matrix.T @ np.asarray(confidence, dtype=np.float64)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
@@ -3,29 +3,43 @@ from math import floor
 
 # majority vote
 class MajorityVote(RankingEnsemble):
-    def __init__(self, motifs):
+    def __init__(self, motifs, lattice=None, value_index=None):
         default_threshold = floor(len(motifs) / 2)
-        super().__init__(motifs, default_threshold=default_threshold)
+        super().__init__(motifs, default_threshold=default_threshold, lattice=lattice, value_index=value_index)
     
     def confidence(self, motif):
         return 1
 
+    def confidences(self, motifs):
+        import numpy as np
+        return np.ones(len(motifs))
+
 class MostSpecific(RankingEnsemble):
-    def __init__(self, motifs):
-        image = set()
-        for motif in motifs:
-            image.udpate(motif.domain())
-        self.total_size = len(image)
-        super().__init__(motifs)
+    def __init__(self, motifs, lattice=None, value_index=None):
+        super().__init__(motifs, lattice=lattice, value_index=value_index)
+        # the index has a key for every value any motif captures
+        self.total_size = len(self._index)
 
     def confidence(self, motif):
         return len(motif.domain()) / self.total_size
 
+    def confidences(self, motifs):
+        import numpy as np
+        sizes = np.fromiter((len(motif.domain()) for motif in motifs), dtype=np.float64, count=len(motifs))
+        return sizes / self.total_size
+
+# weight for a weighted vote, counting the motifs collapsed by deduplication
+def multiplicity(motif):
+    return motif.multiplicity
+
 # vote with a per-motif weight
 class WeightedVote(RankingEnsemble):
-    def __init__(self, motifs, motif_weight):
+    def __init__(self, motifs, motif_weight, lattice=None, value_index=None):
         self._weight = motif_weight
-        super().__init__(motifs)
+        super().__init__(motifs, lattice=lattice, value_index=value_index)
+
+    def rebuild(self, motifs, **kwargs):
+        return self.__class__(motifs, self._weight, **kwargs)
 
     def confidence(self, motif):
         return self._weight(motif)
\ No newline at end of file
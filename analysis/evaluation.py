@@ -1,4 +1,17 @@
-from csv import DictWriter
+from .interner import INTERNER
+from .instrument import instrumented
+
+# columns of a precision-recall curve
+PRC_FIELDS = ['ranking', 'value', 'precision', 'recall', 'gt']
+
+# recall levels at which summaries report (interpolated) precision
+RECALL_GRID = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+# columns of a precision-recall curve summary
+def summary_fields(recall_grid=RECALL_GRID):
+    return [
+        'auc', 'average-precision', 'best-f1', 'best-f1-threshold', 'best-f1-precision', 'best-f1-recall'
+    ] + [f"precision-at-{recall:g}" for recall in recall_grid]
 
 # compute precision, recall, and f beta scores
 def performance_statistics(selected, relevant, beta=1):
@@ -12,37 +25,134 @@ def performance_statistics(selected, relevant, beta=1):
     f_beta = (1 + beta ** 2) * (precision * recall) / ((beta ** 2 * precision) + recall)
     return (precision, recall, f_beta)
 
+# precision-recall curve over ranked values, computed with one sort and cumulative counts
+class PRCurve:
+    # rows are produced in chunks of this size, so the whole curve never sits in memory as dicts
+    CHUNK_SIZE = 10000
+
+    @instrumented('prc')
+    def __init__(self, values, scores, ground_truth):
+        import numpy as np
+        values, scores = np.asarray(values), np.asarray(scores, dtype=np.float64)
+        # sort once, highest ranking first
+        order = np.argsort(-scores, kind='stable')
+        self.values, self.scores = values[order], scores[order]
+        self.gt = np.fromiter((v in ground_truth for v in self.values.tolist()), dtype=bool, count=len(self.values))
+
+        # cumulative true and false positives after selecting each value
+        true_positives = np.cumsum(self.gt)
+        false_positives = np.arange(1, len(self.values) + 1) - true_positives
+
+        # tied values are selected together, so each shares the counts at the end of its tie group
+        if len(self.scores) > 0:
+            ends = np.append(np.flatnonzero(self.scores[1:] != self.scores[:-1]), len(self.scores) - 1)
+        else:
+            ends = np.array([], dtype=np.int64)
+        group = np.repeat(np.arange(len(ends)), np.diff(np.append(-1, ends)))
+        self.thresholds = self.scores[ends]
+        self.point_precision = true_positives[ends] / (true_positives[ends] + false_positives[ends])
+        if len(ground_truth) > 0:
+            self.point_recall = true_positives[ends] / len(ground_truth)
+        else:
+            self.point_recall = np.zeros(len(ends))
+        self.precision, self.recall = self.point_precision[group], self.point_recall[group]
+
+        # area under the curve (trapezoidal) and average precision (step-wise), over the curve points
+        recall_steps = np.diff(np.append(0.0, self.point_recall))
+        precision_pairs = np.append(self.point_precision[:1], self.point_precision)
+        self.auc = float(np.sum(recall_steps * (precision_pairs[1:] + precision_pairs[:-1]) / 2))
+        self.average_precision = float(np.sum(recall_steps * self.point_precision))
+
+    @classmethod
+    def of_ensemble(cls, ensemble, ground_truth, frontier=False):
+        values, scores = ensemble.rank_all(frontier=frontier)
+        return cls(values, scores, ground_truth)
+
+    def __len__(self):
+        return len(self.values)
+
+    # one row per value, in ranking order, reporting each value by its identifier
+    def __iter__(self):
+        for start in range(0, len(self.values), self.CHUNK_SIZE):
+            chunk = slice(start, start + self.CHUNK_SIZE)
+            columns = zip(
+                self.scores[chunk].tolist(), INTERNER.identifiers(self.values[chunk].tolist()),
+                self.precision[chunk].tolist(), self.recall[chunk].tolist(), self.gt[chunk].tolist()
+            )
+            for ranking, value, precision, recall, gt in columns:
+                yield {
+                    'ranking' : ranking,
+                    'value' : value,
+                    'precision' : precision,
+                    'recall' : recall,
+                    'gt' : gt
+                }
+
+    # the rows as whole columns, without going through dicts
+    def columns(self):
+        import numpy as np
+        # indexing copies, so the view of the interner's table doesn't outlive this call
+        if len(self.values) > 0:
+            values = np.frombuffer(INTERNER.identifier_table(), dtype=np.int64)[self.values]
+        else:
+            values = np.array([], dtype=np.int64)
+        return {
+            'ranking' : self.scores,
+            'value' : values,
+            'precision' : self.precision,
+            'recall' : self.recall,
+            'gt' : self.gt
+        }
+
+    # one (threshold, precision, recall) point per distinct ranking
+    def points(self):
+        return zip(self.thresholds.tolist(), self.point_precision.tolist(), self.point_recall.tolist())
+
+    # a handful of numbers standing in for the whole curve
+    def summary(self, recall_grid=RECALL_GRID):
+        import numpy as np
+        summary = {'auc' : self.auc, 'average-precision' : self.average_precision}
+
+        # best f1 over the curve points, and the ranking at which it's reached
+        total = self.point_precision + self.point_recall
+        f1 = np.divide(2 * self.point_precision * self.point_recall, total, out=np.zeros(len(total)), where=total > 0)
+        if len(f1) > 0:
+            best = int(np.argmax(f1))
+            summary.update({
+                'best-f1' : float(f1[best]),
+                'best-f1-threshold' : float(self.thresholds[best]),
+                'best-f1-precision' : float(self.point_precision[best]),
+                'best-f1-recall' : float(self.point_recall[best])
+            })
+        else:
+            summary.update({'best-f1' : 0.0, 'best-f1-threshold' : float('nan'), 'best-f1-precision' : 0.0, 'best-f1-recall' : 0.0})
+
+        # interpolated precision - the best precision at any point reaching the recall level, 0 if none do
+        # recall never decreases along the curve, so that's a suffix maximum read off at a binary-searched point
+        envelope = np.append(np.maximum.accumulate(self.point_precision[::-1])[::-1], 0.0)
+        reached = np.searchsorted(self.point_recall, np.asarray(recall_grid, dtype=np.float64) - 1e-12, side='left')
+        for recall, precision in zip(recall_grid, envelope[reached].tolist()):
+            summary[f"precision-at-{recall:g}"] = precision
+
+        return summary
+
+    # stream the rows into a csv file, or write the columns to an .npz
+    @instrumented('write')
+    def write(self, output):
+        from .results import open_results
+        with open_results(output, PRC_FIELDS) as results:
+            results.write_curve(self)
+
+# lazily-produced precision-recall curve for an ensemble
+def prc_curve(ensemble, ground_truth, frontier=False):
+    return PRCurve.of_ensemble(ensemble, ground_truth, frontier=frontier)
+
 # precision-recall evaluation
 def prc(ensemble, ground_truth, output=None, frontier=False):
-    # sort the values by the ranking
-    ranking = [(v, ensemble.rank(v, frontier=frontier)) for v in ensemble.domain()]
-    ranking.sort(key=lambda p: p[-1], reverse=True)
-
-    # list to hold the already-selectd iamges
-    selected = set()
-    # and the output
-    result = []
-
-    # compute the values
-    for (value, ranking) in ranking:
-        selected.add(value)
-        try: precision, recall, _ = performance_statistics(selected, ground_truth, beta=1)
-        except: precision, recall = 0, 0
-        result.append({
-            'ranking' : ranking,
-            'value' : value,
-            'precision' : precision,
-            'recall' : recall,
-            'gt' : value in ground_truth
-        })
+    curve = prc_curve(ensemble, ground_truth, frontier=frontier)
 
     # if we've been given output, use it, otherwise just return
-    if output is None: return result
+    if output is None: return list(curve)
     else:
-        with open(output, 'w') as f:
-            writer = DictWriter(f, fieldnames=[
-                'ranking', 'value', 'precision', 'recall', 'gt'
-            ])
-            writer.writeheader()
-            for row in result:
-                writer.writerow(result)
\ No newline at end of file
+        curve.write(output)
+        return curve
@@ -0,0 +1,218 @@
+import json, os
+from collections import namedtuple
+from contextlib import ExitStack
+from .motif import load_motifs
+from .ensemble import ensemble_from_string
+from .active import Active
+from .evaluation import performance_statistics, prc_curve, prc, summary_fields
+from .utility import load_ground_truth
+from .results import open_results
+from .instrument import stage, PROFILER
+
+# the experiments behind scripts/evaluate, each writing the same output as its script
+
+def evaluate_active(ensemble, gt, output, learning_steps=1, **_):
+    # for some statistics
+    number_of_motifs = ensemble.size
+
+    # open the output file and fake active learning here
+    with open_results(output, [
+        'learning-step', 'ensemble-ratio', 'precision', 'recall', 'f-beta', 'beta'
+    ]) as writer:
+
+        # make the active loop
+        active = Active(ensemble)
+
+        # for each step of the learning...
+        for step in range(learning_steps):
+            # compute the image and how good it is
+            image = active.ensemble.domain()
+            precision, recall, f1 = performance_statistics(image, gt, beta=1)
+
+            # write the results to the output file
+            writer.writerow({
+                'learning-step': step,
+                'ensemble-ratio': active.ensemble.size / number_of_motifs,
+                'precision': precision, 'recall': recall, 'f-beta': f1, 'beta': 1
+            })
+
+            # update the motifs by faking a learning loop
+            split = active.candidate_split()
+            if split is None: break
+            active = active.split_on(split, split in gt)
+
+# in summary mode each step writes one row of summary_fields, and the full curve goes to curve (if given)
+def evaluate_active_prc(ensemble, gt, output, learning_steps=1, frontier=False, summary=False, curve=None, **_):
+    # for some statistics
+    number_of_motifs = ensemble.size
+
+    # open the output file(s) and fake active learning here
+    with ExitStack() as files:
+        curve_fields = ['learning-step', 'ensemble-ratio', 'precision', 'recall', 'ranking', 'gt', 'value']
+        curve_writer, summary_writer = None, None
+        if summary:
+            summary_writer = files.enter_context(open_results(output, ['learning-step', 'ensemble-ratio'] + summary_fields()))
+        if not summary or curve is not None:
+            curve_writer = files.enter_context(open_results(curve if summary else output, curve_fields))
+
+        # make the active loop
+        active = Active(ensemble)
+
+        # for each step of the learning...
+        for step in range(learning_steps):
+            results = prc_curve(active.ensemble, gt, frontier=frontier)
+            ratio = active.ensemble.size / number_of_motifs
+            with stage('write'):
+                if summary_writer is not None:
+                    summary_writer.writerow({'learning-step' : step, 'ensemble-ratio' : ratio, **results.summary()})
+                if curve_writer is not None:
+                    curve_writer.write_curve(results, **{'learning-step' : step, 'ensemble-ratio' : ratio})
+
+            # update the motifs by faking a learning loop
+            split = active.candidate_split(frontier=frontier)
+            if split is None: break
+            active = active.split_on(split, split in gt)
+
+def evaluate_active_frontier_prc(ensemble, gt, output, learning_steps=1, summary=False, curve=None, **_):
+    evaluate_active_prc(ensemble, gt, output, learning_steps=learning_steps, frontier=True, summary=summary, curve=curve)
+
+def evaluate_ensemble(ensemble, gt, output, name=None, **_):
+    precision, recall, f1 = performance_statistics(ensemble.domain(), gt, beta=1)
+
+    # appended to, so many ensembles can share one output
+    with open(output, 'a') as f:
+        f.write(f"{precision},{recall},{f1},{name}\n")
+
+def evaluate_frontier(ensemble, gt, output, **_):
+    # write out frontier and non-frontier results
+    with open_results(output, ['frontier', 'precision', 'recall', 'ranking', 'gt', 'value']) as writer:
+        # evaluate prc for no frontier, and then for frontier
+        for frontier in (False, True):
+            with stage('write'):
+                writer.write_curve(prc_curve(ensemble, gt, frontier=frontier), frontier=frontier)
+
+def evaluate_prc(ensemble, gt, output, **_):
+    prc(ensemble, gt, output=output)
+
+# mode names, matching the scripts they replace
+MODES = {
+    'active' : evaluate_active,
+    'active-prc' : evaluate_active_prc,
+    'active-frontier-prc' : evaluate_active_frontier_prc,
+    'ensemble' : evaluate_ensemble,
+    'frontier' : evaluate_frontier,
+    'prc' : evaluate_prc,
+}
+
+# a single experiment to run
+Job = namedtuple('Job', [
+    'ground_truth', 'image', 'ensemble', 'mode', 'output', 'learning_steps', 'summary', 'curve'
+], defaults=[1, False, None])
+
+def job_of_json(json_rep):
+    if json_rep['mode'] not in MODES:
+        raise ValueError(f"unknown mode {json_rep['mode']}, expected one of {', '.join(MODES)}")
+    return Job(
+        ground_truth=json_rep['ground-truth'],
+        image=json_rep['image'],
+        ensemble=json_rep.get('ensemble', 'count'),
+        mode=json_rep['mode'],
+        output=json_rep['output'],
+        learning_steps=int(json_rep.get('learning-steps', 1)),
+        summary=json_rep.get('summary', False) in (True, 'true', '1'),
+        curve=json_rep.get('curve', None)
+    )
+
+# a job given as comma-separated key=value pairs, where a backslash escapes the character after it (so paths can
+# hold commas, as \, and backslashes, as \\)
+def job_of_string(string):
+    pairs, pair, characters = [], [], iter(string)
+    for character in characters:
+        if character == '\\':
+            pair.append(next(characters, '\\'))
+        elif character == ',':
+            pairs.append(''.join(pair))
+            pair = []
+        else:
+            pair.append(character)
+    pairs.append(''.join(pair))
+    for pair in pairs:
+        if '=' not in pair:
+            raise ValueError(f"expected key=value, got {pair!r}")
+    return job_of_json(dict(pair.split('=', 1) for pair in pairs))
+
+# everything a process has loaded, so jobs sharing an image or ground truth only load it once
+# values are interned per process, so none of this is ever sent between processes
+class Workspace:
+    def __init__(self):
+        self._ground_truth = {}
+        self._images = {}
+        self._ensembles = {}
+
+    def ground_truth(self, filename):
+        if filename not in self._ground_truth:
+            with open(filename, 'r') as f:
+                self._ground_truth[filename], _ = load_ground_truth(json.load(f))
+        return self._ground_truth[filename]
+
+    def image(self, filename):
+        if filename not in self._images:
+            self._images[filename] = load_motifs(filename)
+        return self._images[filename]
+
+    # ensembles are never changed by the experiments (filtering builds new ones), so they're shared too
+    def ensemble(self, filename, kind):
+        cls = ensemble_from_string(kind)
+        if (filename, cls) not in self._ensembles:
+            motifs = self.image(filename)
+            with stage('ensemble'):
+                self._ensembles[(filename, cls)] = cls(motifs)
+        return self._ensembles[(filename, cls)]
+
+    def run(self, job):
+        gt = self.ground_truth(job.ground_truth)
+        ensemble = self.ensemble(job.image, job.ensemble)
+        MODES[job.mode](
+            ensemble, gt, job.output,
+            learning_steps=job.learning_steps, name=job.ensemble, summary=job.summary, curve=job.curve
+        )
+        return job
+
+WORKSPACE = Workspace()
+
+def run_job(job):
+    return WORKSPACE.run(job)
+
+# pool workers never get to report at exit, so when profiling each job sends its stages back with it
+def run_profiled_job(job):
+    job = run_job(job)
+    return job, os.getpid(), PROFILER.drain()
+
+# compile each image up front, so every worker memory-maps the same cache rather than parsing the json
+def compile_images(jobs):
+    from .cache import cache_path, open_cache, compile_image, is_cache
+    from .stream import is_stream
+    for filename in sorted({job.image for job in jobs}):
+        if is_cache(filename) or is_stream(filename): continue
+        if open_cache(filename) is None:
+            compile_image(filename, cache_path(filename))
+
+# run every job, over a pool of processes if asked - yields jobs as they finish
+def run_jobs(jobs, processes=1, compile=True):
+    jobs = list(jobs)
+    if compile: compile_images(jobs)
+    if processes <= 1:
+        yield from map(run_job, jobs)
+        return
+    from multiprocessing import Pool
+    # jobs sharing an image sit together, so a worker is likely to reuse what it just loaded
+    jobs.sort(key=lambda job: (job.image, job.ground_truth, job.ensemble))
+    # workers start by dropping whatever they inherited, which the parent reports itself
+    with Pool(processes, initializer=PROFILER.drain) as pool:
+        chunksize = max(1, len(jobs) // (4 * processes))
+        if not PROFILER.enabled:
+            yield from pool.imap_unordered(run_job, jobs, chunksize=chunksize)
+            return
+        for job, process, (events, stages) in pool.imap_unordered(run_profiled_job, jobs, chunksize=chunksize):
+            PROFILER.merge(events, stages, process=process)
+            yield job
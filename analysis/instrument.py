@@ -0,0 +1,122 @@
+import atexit, json, os, sys, time, tracemalloc
+from functools import wraps
+
+# stage-level timing and memory instrumentation
+# switched on by setting MOTIFS_PROFILE (to a path, to also write the trace there) or by calling enable()
+# when off, an instrumented call costs one attribute check
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.output = None
+        # one event per instrumented call, and running totals per stage
+        self.events = []
+        self.stages = {}
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    def enter(self, name):
+        if self.memory:
+            # fold the peak so far into the enclosing stage before starting a fresh one
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack: self._stack[-1][3] = max(self._stack[-1][3], peak)
+            tracemalloc.reset_peak()
+            self._stack.append([name, time.perf_counter(), current, current])
+        else:
+            self._stack.append([name, time.perf_counter(), 0, 0])
+
+    def exit(self):
+        name, start, base, peak = self._stack.pop()
+        seconds = time.perf_counter() - start
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if self._stack: self._stack[-1][3] = max(self._stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        peak = peak - base
+        self.events.append({
+            'stage' : name,
+            'start' : start - self._origin,
+            'seconds' : seconds,
+            'peak-bytes' : peak if self.memory else None,
+            'depth' : len(self._stack)
+        })
+        totals = self.stages.setdefault(name, {'calls' : 0, 'seconds' : 0.0, 'peak-bytes' : 0})
+        totals['calls'] += 1
+        totals['seconds'] += seconds
+        totals['peak-bytes'] = max(totals['peak-bytes'], peak)
+
+    # take everything recorded so far, leaving nothing behind - how pool workers send their stages home
+    def drain(self):
+        recorded = (self.events, self.stages)
+        self.events, self.stages = [], {}
+        return recorded
+
+    # fold in what another process recorded (perf_counter is system-wide, so event starts still line up)
+    def merge(self, events, stages, process=None):
+        for event in events:
+            self.events.append(dict(event, process=process))
+        for name, other in stages.items():
+            totals = self.stages.setdefault(name, {'calls' : 0, 'seconds' : 0.0, 'peak-bytes' : 0})
+            totals['calls'] += other['calls']
+            totals['seconds'] += other['seconds']
+            totals['peak-bytes'] = max(totals['peak-bytes'], other['peak-bytes'])
+
+    def summary(self):
+        lines = [f"{'stage':<20} {'calls':>8} {'seconds':>10} {'mean (ms)':>10} {'peak MiB':>10}"]
+        for name, totals in sorted(self.stages.items(), key=lambda p: p[1]['seconds'], reverse=True):
+            peak = f"{totals['peak-bytes'] / 2 ** 20:.1f}" if self.memory else '-'
+            lines.append(
+                f"{name:<20} {totals['calls']:>8} {totals['seconds']:10.3f} "
+                f"{1000 * totals['seconds'] / totals['calls']:10.3f} {peak:>10}"
+            )
+        return '\n'.join(lines)
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump({'memory' : self.memory, 'stages' : self.stages, 'events' : self.events}, f)
+
+    def report(self):
+        if not self.enabled or not self.stages: return
+        if self.output is not None:
+            self.write(self.output)
+        print(self.summary(), file=sys.stderr)
+
+PROFILER = Profiler()
+atexit.register(PROFILER.report)
+
+def enable(output=None, memory=True):
+    PROFILER.enabled, PROFILER.output, PROFILER.memory = True, output, memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+# instrument a block as a named stage
+class stage:
+    __slots__ = ('name', 'active')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.active = PROFILER.enabled
+        if self.active: PROFILER.enter(self.name)
+        return self
+
+    def __exit__(self, *_):
+        if self.active: PROFILER.exit()
+
+# instrument every call to a function as a named stage
+def instrumented(name):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled: return f(*args, **kwargs)
+            PROFILER.enter(name)
+            try: return f(*args, **kwargs)
+            finally: PROFILER.exit()
+        return wrapper
+    return decorator
+
+if os.environ.get('MOTIFS_PROFILE'):
+    value = os.environ['MOTIFS_PROFILE']
+    enable(output=None if value == '1' else value, memory=os.environ.get('MOTIFS_PROFILE_MEMORY', '1') != '0')
@@ -0,0 +1,74 @@
+from array import array
+
+# maps (file, identifier) pairs to dense integer keys, so values from different files never collide
+class Interner:
+    __slots__ = ('files', '_file_indices', '_key_files', '_key_identifiers', '_keys')
+
+    def __init__(self):
+        # file table
+        self.files = []
+        self._file_indices = {}
+        # key -> file index and identifier
+        self._key_files = array('l')
+        self._key_identifiers = array('q')
+        # packed (identifier, file index) -> key
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._key_identifiers)
+
+    # index of a file in the file table, adding it if necessary
+    def file(self, filename):
+        index = self._file_indices.get(filename)
+        if index is None:
+            index = len(self.files)
+            self.files.append(filename)
+            self._file_indices[filename] = index
+        return index
+
+    def intern(self, filename, identifier):
+        return self.intern_all(self.file(filename), (identifier,))[0]
+
+    # keys for many identifiers from the same file, given its index in the file table
+    def intern_all(self, file_index, identifiers):
+        keys, result = self._keys, array('q')
+        for identifier in identifiers:
+            packed = (identifier << 32) | file_index
+            key = keys.get(packed)
+            if key is None:
+                key = len(keys)
+                keys[packed] = key
+                self._key_files.append(file_index)
+                self._key_identifiers.append(identifier)
+            result.append(key)
+        return result
+
+    # key for a pair that may not have been seen, without interning it
+    def find(self, filename, identifier):
+        index = self._file_indices.get(filename)
+        if index is None: return None
+        return self._keys.get((identifier << 32) | index)
+
+    def file_index(self, key):
+        return self._key_files[key]
+
+    def filename(self, key):
+        return self.files[self._key_files[key]]
+
+    def identifier(self, key):
+        return self._key_identifiers[key]
+
+    def identifiers(self, keys):
+        identifiers = self._key_identifiers
+        return [identifiers[key] for key in keys]
+
+    # identifiers of every key, indexed by key - an array('q'), so it can be viewed as a buffer
+    # (the view must be dropped before anything new is interned)
+    def identifier_table(self):
+        return self._key_identifiers
+
+    def lookup(self, key):
+        return (self.filename(key), self.identifier(key))
+
+# the interner shared by everything in the process
+INTERNER = Interner()
@@ -1,47 +1,135 @@
 import json
+from array import array
+from bisect import bisect_left
+from .interner import INTERNER
+from .instrument import instrumented
 
-# row
+# row - the sorted identifiers a motif captures in a single file
 class Row:
+    __slots__ = ('file', 'image', '_file_index')
+
     def __init__(self, file, image):
-        self.file = file
+        self._file_index = INTERNER.file(file)
+        self.file = INTERNER.files[self._file_index]
+        # arrays (and views) are trusted to already be sorted
+        if not isinstance(image, (array, memoryview)):
+            image = array('q', sorted(set(image)))
         self.image = image
+    # membership is by interned key, so only values from this row's file match
     def __contains__(self, other):
-        return other in self.image
+        if INTERNER.file_index(other) != self._file_index: return False
+        identifier = INTERNER.identifier(other)
+        position = bisect_left(self.image, identifier)
+        return position < len(self.image) and self.image[position] == identifier
+    def __len__(self):
+        return len(self.image)
+    # interned keys for every identifier in the row
+    def keys(self):
+        return INTERNER.intern_all(self._file_index, self.image)
     @classmethod
     def of_json(cls, json_rep):
-        return cls(json_rep['file'], set(json_rep['image']))
+        return cls(json_rep['file'], json_rep['image'])
 
 # motifs
 class Motif:
-    def __init__(self, motif, rows):
+    __slots__ = ('motif', 'rows', 'multiplicity', '_domain')
+
+    def __init__(self, motif, rows, multiplicity=1):
         self.motif = motif
         self.rows = rows
+        # how many motifs with this exact image were collapsed into this one
+        self.multiplicity = multiplicity
+        self._domain = None
     def __contains__(self, other):
-        return any([other in row for row in self.rows])
-    # what are the values captured by this motif
+        return other in self.domain()
+    # what are the (interned) values captured by this motif - computed once, then shared
     def domain(self):
-        result = set()
-        for row in self.rows:
-            result.update(row.image)
-        return result
+        if self._domain is None:
+            result = set()
+            for row in self.rows:
+                result.update(row.keys())
+            self._domain = frozenset(result)
+        return self._domain
     # for ease of construction
     @classmethod
     def of_json(cls, json_rep):
         rows = [Row.of_json(row) for row in json_rep['images']]
         return cls(json_rep['motif'], rows)
 
-# loading from file
-def load_motifs(filename, unique=False):
-    motifs = []
+# incrementally decode the objects in a top-level json list, reading the file in chunks
+def iter_json_list(f, chunk_size=1 << 20):
+    decoder = json.JSONDecoder()
+    buffer, position, started, done = "", 0, False, False
+    while True:
+        # skip whitespace and separators between elements
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("expected a json list of motifs")
+                started, position = True, position + 1
+                continue
+            if buffer[position] == ']': return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the element runs past the buffer, so we need more input
+                if done: raise
+            else:
+                yield element
+                position = end
+                continue
+        if done:
+            raise ValueError("unexpected end of motif list")
+        # drop what's been consumed and grow the buffer - doubling reads keeps huge elements linear
+        chunk = f.read(max(chunk_size, len(buffer) - position))
+        buffer, position = buffer[position:] + chunk, 0
+        done = chunk == ""
+
+def parse_motifs(filename):
+    # streamed images are read whole, as a motif's rows are spread across the stream
+    from .stream import is_stream, read_stream
+    if is_stream(filename):
+        yield from read_stream(filename).current_motifs()
+        return
     with open(filename, 'r') as f:
-        for motif in json.load(f):
-            motifs.append(Motif.of_json(motif))
+        for motif in iter_json_list(f):
+            yield Motif.of_json(motif)
+
+# yield motifs one at a time, dropping any that fail the predicate, and stopping after max_rows motifs
+def iter_motifs(filename, predicate=None, max_rows=None):
+    if max_rows is not None and max_rows <= 0: return
+    # compiled images are read straight out of memory, everything else is parsed
+    from .cache import open_cache
+    compiled = open_cache(filename)
+    if compiled is not None:
+        motifs = iter(compiled)
+    else:
+        motifs = parse_motifs(filename)
+    count = 0
+    for motif in motifs:
+        if predicate is not None and not predicate(motif): continue
+        yield motif
+        count += 1
+        if max_rows is not None and count >= max_rows: return
+
+# collapse motifs with identical images, keeping the first of each and (optionally) counting the rest
+def unique_motifs(motifs, multiplicity=True):
+    survivors = {}
+    for motif in motifs:
+        survivor = survivors.get(motif.domain())
+        if survivor is None:
+            survivors[motif.domain()] = motif
+        elif multiplicity:
+            survivor.multiplicity += motif.multiplicity
+    return list(survivors.values())
+
+# loading from file
+@instrumented('load_motifs')
+def load_motifs(filename, unique=False, predicate=None, max_rows=None, multiplicity=True):
+    motifs = iter_motifs(filename, predicate=predicate, max_rows=max_rows)
     if unique:
-        results, images = [], []
-        for motif in motifs:
-            if motif.domain() not in images:
-                results.append(motif)
-                images.append(motif)
-        return results
+        return unique_motifs(motifs, multiplicity=multiplicity)
     else:
-        return motifs
\ No newline at end of file
+        return list(motifs)
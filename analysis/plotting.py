@@ -0,0 +1,161 @@
+from collections import namedtuple
+from .utility import load_prcs
+
+# shared core of scripts/plot - curves are decimated before drawing, and many figures can be drawn per process
+
+# most points drawn for any one curve
+MAX_POINTS = 2000
+
+# positions (in curve order) of the points worth drawing
+# the x axis is cut into max_points / 4 equal bins, and each bin keeps its first and last points (so steps stay
+# where they are) and its highest and lowest y (so the envelope survives) - curves no longer than max_points are kept whole
+def decimate_indices(x, y, max_points=MAX_POINTS):
+    import numpy as np
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if max_points <= 0 or len(x) <= max_points:
+        return np.arange(len(x))
+    bins = max(1, max_points // 4)
+    low, high = np.nanmin(x), np.nanmax(x)
+    width = (high - low) / bins if high > low else 1.0
+    which = np.clip(((x - low) / width).astype(np.int64), 0, bins - 1)
+
+    # bins can be revisited if x ever decreases, so group by bin rather than by run
+    order = np.argsort(which, kind='stable')
+    starts = np.flatnonzero(np.diff(np.append(-1, which[order])))
+    ends = np.append(starts[1:], len(order)) - 1
+    highest = np.lexsort((-y, which))[starts]
+    lowest = np.lexsort((y, which))[starts]
+    return np.unique(np.concatenate([order[starts], order[ends], highest, lowest]))
+
+# decimate each curve in a frame separately, curves being told apart by the by columns
+def decimate(frame, by=(), x='recall', y='precision', max_points=MAX_POINTS):
+    import numpy as np
+    if max_points <= 0 or len(frame) <= max_points:
+        return frame
+    by = [by] if isinstance(by, str) else list(by)
+    if not by:
+        return frame.iloc[decimate_indices(frame[x].to_numpy(), frame[y].to_numpy(), max_points)]
+    keep = []
+    for positions in frame.groupby(by, observed=True, sort=False).indices.values():
+        kept = decimate_indices(frame[x].to_numpy()[positions], frame[y].to_numpy()[positions], max_points)
+        keep.append(positions[kept])
+    return frame.iloc[np.sort(np.concatenate(keep))]
+
+# a figure to draw, of one of the kinds below, from the (concatenated) results in inputs
+Figure = namedtuple('Figure', ['kind', 'inputs', 'output', 'title'], defaults=[None, None])
+
+# the figures the plot scripts draw
+KINDS = {
+    'prc' : {'style' : 'curve', 'hue' : 'tag', 'title' : "Precision-Recall Curve"},
+    'active-prc' : {'style' : 'curve', 'hue' : 'learning-step', 'title' : "Precision-Recall Curve for Active Learning"},
+    'active-frontier-prc' : {
+        'style' : 'curve', 'hue' : 'learning-step', 'title' : "Precision-Recall Curve for Active Learning (Frontier)"
+    },
+    'frontier' : {'style' : 'curve', 'hue' : 'frontier', 'title' : "Precision-Recall Curve"},
+    'active-performance' : {
+        'style' : 'performance', 'x' : 'learning-step', 'xlabel' : "Learning Steps",
+        'statistics' : ['precision', 'recall', 'f-beta', 'ensemble-ratio'], 'title' : "Performance Indicators"
+    },
+    'disjunction-performance' : {
+        'style' : 'performance', 'x' : 'ensemble-ratio', 'xlabel' : "Ensemble Ratio",
+        'statistics' : ['precision', 'recall', 'f-beta'], 'title' : "Performance Indicators"
+    },
+}
+
+# precision-recall curves, one per hue value
+def draw_curves(data, kind, max_points=MAX_POINTS):
+    import seaborn
+    import matplotlib.pyplot as plt
+    hue = kind['hue']
+    data = decimate(data, by=hue, max_points=max_points)
+
+    # set some stylistic stuff up
+    seaborn.set_style("white")
+    palette = seaborn.color_palette('husl', n_colors=max(1, data[hue].nunique()))
+
+    # plot the darn thing
+    seaborn.lineplot(x='recall', y='precision', data=data,
+        hue=hue, estimator=None, sort=False,
+        palette=palette
+    )
+    seaborn.despine()
+
+    # some basic styling
+    plt.xlabel("Recall")
+    plt.xlim(0, 1.1)
+    plt.ylabel("Precision")
+    plt.ylim(0, 1.1)
+
+# statistics against a single variable - these are small, so nothing is decimated
+def draw_performance(data, kind, **_):
+    import seaborn, pandas
+    import matplotlib.pyplot as plt
+    # convert data pivot style
+    data = pandas.melt(
+        data,
+        id_vars=[kind['x']],
+        value_vars=kind['statistics'],
+        var_name='statistic',
+        value_name='performance'
+    )
+
+    # set some stylistic stuff up
+    seaborn.set_style("white")
+    palette = seaborn.color_palette('husl', len(kind['statistics']))
+
+    # plot the darn thing
+    seaborn.lineplot(
+        x=kind['x'], y='performance', data=data,
+        hue='statistic', palette=palette)
+    seaborn.despine()
+
+    # some basic styling
+    plt.xlabel(kind['xlabel'])
+    plt.ylabel("Performance")
+
+STYLES = {'curve' : draw_curves, 'performance' : draw_performance}
+
+# results already loaded in this process, keyed by the inputs they came from
+LOADED = {}
+
+def load(inputs):
+    inputs = tuple(inputs)
+    if inputs not in LOADED:
+        LOADED[inputs] = load_prcs(list(inputs))
+    return LOADED[inputs]
+
+# draw a single figure, saving it if there's an output and showing it otherwise
+def render(figure, max_points=MAX_POINTS):
+    import matplotlib
+    if figure.output is not None: matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    kind = KINDS[figure.kind]
+    plt.figure()
+    try:
+        STYLES[kind['style']](load(figure.inputs), kind, max_points=max_points)
+        plt.title(figure.title if figure.title is not None else kind['title'])
+        if figure.output is not None:
+            plt.savefig(figure.output)
+        else:
+            plt.show()
+    finally:
+        plt.close()
+    return figure
+
+def _render(task):
+    figure, max_points = task
+    return render(figure, max_points=max_points)
+
+# draw many figures, loading each set of inputs once - with processes > 1 the figures are drawn over a pool,
+# whose workers are forked after loading and so share the loaded results rather than reloading them
+def render_all(figures, processes=1, max_points=MAX_POINTS):
+    figures = list(figures)
+    for figure in figures:
+        load(figure.inputs)
+    tasks = [(figure, max_points) for figure in figures]
+    if processes <= 1:
+        yield from map(_render, tasks)
+        return
+    from multiprocessing import get_context
+    with get_context('fork').Pool(processes) as pool:
+        yield from pool.imap_unordered(_render, tasks)
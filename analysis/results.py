@@ -0,0 +1,87 @@
+import csv
+
+# experiment results are csv by default, or columnar (an .npz of typed arrays, one per column) by suffix
+COLUMNAR_SUFFIX = '.npz'
+
+def is_columnar(filename):
+    return str(filename).endswith(COLUMNAR_SUFFIX)
+
+# rows written one at a time, for the same interface as the columnar writer
+class CSVResults:
+    def __init__(self, f, fields):
+        self._writer = csv.DictWriter(f, fieldnames=fields)
+        self._writer.writeheader()
+
+    def writerow(self, row):
+        self._writer.writerow(row)
+
+    # a whole precision-recall curve, with the same extra columns on every row
+    def write_curve(self, curve, **extra):
+        for row in curve:
+            row.update(extra)
+            self._writer.writerow(row)
+
+# columns gathered as arrays and written once, when closed
+class ColumnarResults:
+    def __init__(self, f, fields):
+        self._file = f
+        self.fields = fields
+        self._chunks = {field : [] for field in fields}
+        self._rows = {field : [] for field in fields}
+
+    # single rows are buffered as lists, and turned into a chunk when a curve arrives (or on close)
+    def writerow(self, row):
+        for field in self.fields:
+            self._rows[field].append(row[field])
+
+    def _flush_rows(self):
+        import numpy as np
+        if not self._rows[self.fields[0]]: return
+        for field in self.fields:
+            self._chunks[field].append(np.asarray(self._rows[field]))
+            self._rows[field] = []
+
+    def write_curve(self, curve, **extra):
+        import numpy as np
+        self._flush_rows()
+        columns = curve.columns()
+        for field in self.fields:
+            if field in columns:
+                self._chunks[field].append(columns[field])
+            else:
+                self._chunks[field].append(np.full(len(curve), extra[field]))
+
+    def close(self):
+        import numpy as np
+        self._flush_rows()
+        columns = {field : np.concatenate(chunks) if chunks else np.array([]) for field, chunks in self._chunks.items()}
+        # column order is kept alongside, as npz entries have none
+        np.savez(self._file, __fields__=np.array(self.fields), **columns)
+
+# open a results file for writing, picking the format from the filename
+class open_results:
+    def __init__(self, filename, fields):
+        self.filename = filename
+        self.fields = fields
+
+    def __enter__(self):
+        if is_columnar(self.filename):
+            self._file = open(self.filename, 'wb')
+            self._results = ColumnarResults(self._file, self.fields)
+        else:
+            self._file = open(self.filename, 'w')
+            self._results = CSVResults(self._file, self.fields)
+        return self._results
+
+    def __exit__(self, kind, *_):
+        try:
+            if kind is None and isinstance(self._results, ColumnarResults):
+                self._results.close()
+        finally:
+            self._file.close()
+
+# columns of a columnar results file, in the order they were written
+def read_columns(filename):
+    import numpy as np
+    with np.load(filename) as data:
+        return {field : data[field] for field in data['__fields__'].tolist()}
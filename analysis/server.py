@@ -0,0 +1,200 @@
+import json, threading, traceback, uuid
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .motif import load_motifs
+from .ensemble import ensemble_from_string, RankingEnsemble
+from .active import Active
+from .interner import INTERNER
+
+# unknown images, ensembles, and sessions - as opposed to malformed requests
+class NotFound(LookupError):
+    pass
+
+# an active-learning session, holding its own (shrinking) ensemble - anything reading and replacing its state
+# holds the session throughout, so concurrent requests on one session can't lose each other's updates
+class Session:
+    def __init__(self, active):
+        self.active = active
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self._lock.release()
+
+# images loaded once, with ensembles built on first use and kept warm
+class EnsembleStore:
+    def __init__(self):
+        self.images = {}
+        self._ensembles = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, filename, unique=False):
+        self.images[name] = load_motifs(filename, unique=unique)
+
+    def ensemble(self, image, kind):
+        if image not in self.images:
+            raise NotFound(f"no image named {image}")
+        try:
+            cls = ensemble_from_string(kind)
+        except IndexError:
+            raise NotFound(f"no ensemble like {kind}")
+        with self._lock:
+            if (image, cls) not in self._ensembles:
+                ensemble = cls(self.images[image])
+                # ensembles fill some caches in on first use - fill them here, under the lock, so that request
+                # threads only ever read them (incidence matrices are left out, as no endpoint ranks in bulk)
+                if isinstance(ensemble, RankingEnsemble):
+                    for frontier in (False, True):
+                        ensemble.buckets(frontier=frontier)
+                self._ensembles[(image, cls)] = ensemble
+            return self._ensembles[(image, cls)]
+
+    def start_session(self, image, kind):
+        session = uuid.uuid4().hex
+        active = Active(self.ensemble(image, kind))
+        with self._lock:
+            self._sessions[session] = Session(active)
+        return session
+
+    def session(self, session):
+        with self._lock:
+            if session not in self._sessions:
+                raise NotFound(f"no session {session}")
+            return self._sessions[session]
+
+    def end_session(self, session):
+        with self._lock:
+            self._sessions.pop(session, None)
+
+# (file, identifier) pairs to interned values - values we've never seen can't be captured by anything
+def values_of(pairs):
+    return [INTERNER.find(file, identifier) for file, identifier in pairs]
+
+def pair_of(value):
+    return None if value is None else list(INTERNER.lookup(value))
+
+# request handlers, each taking the store and the decoded request body
+def classify(store, request):
+    ensemble = store.ensemble(request['image'], request.get('ensemble', 'disjunction'))
+    options = {}
+    if 'threshold' in request: options['threshold'] = request['threshold']
+    if 'frontier' in request: options['frontier'] = request['frontier']
+    return {'results': [
+        value is not None and ensemble.classify(value, **options) for value in values_of(request['values'])
+    ]}
+
+def rank(store, request):
+    ensemble = store.ensemble(request['image'], request.get('ensemble', 'count'))
+    frontier = request.get('frontier', False)
+    return {'results': [
+        0.0 if value is None else ensemble.rank(value, frontier=frontier) for value in values_of(request['values'])
+    ]}
+
+def top_k(store, request):
+    ensemble = store.ensemble(request['image'], request.get('ensemble', 'count'))
+    ranked = ensemble.top_k(request['k'], frontier=request.get('frontier', False))
+    return {'results': [pair_of(value) + [ranking] for value, ranking in ranked]}
+
+def active_start(store, request):
+    return {'session': store.start_session(request['image'], request.get('ensemble', 'disjunction'))}
+
+# inclusion counts are cached on first use, so even finding a candidate holds the session
+def active_candidate(store, request):
+    frontier = request.get('frontier', False)
+    with store.session(request['session']) as session:
+        return {'value': pair_of(session.active.candidate_split(frontier=frontier))}
+
+def active_split(store, request):
+    file, identifier = request['value']
+    label = request['label']
+    value = INTERNER.find(file, identifier)
+    with store.session(request['session']) as session:
+        if value is not None:
+            session.active = session.active.split_on(value, label)
+        return {'size': session.active.ensemble.size}
+
+def active_end(store, request):
+    store.end_session(request['session'])
+    return {}
+
+ROUTES = {
+    '/classify' : classify,
+    '/rank' : rank,
+    '/top_k' : top_k,
+    '/active/start' : active_start,
+    '/active/candidate' : active_candidate,
+    '/active/split' : active_split,
+    '/active/end' : active_end
+}
+
+class Handler(BaseHTTPRequestHandler):
+    store = None
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/images':
+            self.respond(200, {name : len(motifs) for name, motifs in self.store.images.items()})
+        else:
+            self.respond(404, {'error': f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        route = ROUTES.get(self.path)
+        if route is None:
+            return self.respond(404, {'error': f"unknown endpoint {self.path}"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            self.respond(200, route(self.store, request))
+        except NotFound as e:
+            self.respond(404, {'error': str(e)})
+        except KeyError as e:
+            self.respond(400, {'error': f"missing field {e}"})
+        except (ValueError, TypeError, IndexError, AttributeError, NotImplementedError) as e:
+            self.respond(400, {'error': f"{type(e).__name__}: {e}"})
+        # anything else is our fault, not the client's - log it, and still answer in json
+        except Exception as e:
+            self.log_error("%s failed:\n%s", self.path, traceback.format_exc())
+            self.respond(500, {'error': f"{type(e).__name__}: {e}"})
+
+    # keep the request log off stderr unless asked for, but always report errors
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        super().log_message(format, *args)
+
+def serve(store, host='127.0.0.1', port=8765, verbose=False):
+    handler = type('StoreHandler', (Handler,), {'store': store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.verbose = verbose
+    return server
+
+# main
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--image", nargs="+", required=True, help="images to load, as name=path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unique", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+
+    args = parser.parse_args()
+
+    store = EnsembleStore()
+    for image in args.image:
+        name, _, filename = image.rpartition('=')
+        store.load(name or filename, filename, unique=args.unique)
+    server = serve(store, host=args.host, port=args.port, verbose=args.verbose)
+    print(f"Serving {', '.join(store.images.keys())} on {args.host}:{args.port}...")
+    server.serve_forever()
@@ -0,0 +1,220 @@
+import json, os, sqlite3
+from argparse import ArgumentParser
+from urllib.request import pathname2url
+
+# evaluating synthesized motifs against document databases, as ./evaluate does (see lib/domain/SQL.ml)
+# documents hold a vertex table, an (id, value) table per attribute, and a (source, target) table per edge label
+# motifs are in the format synthesize writes - a selector, and a structure of vertices labelled with
+# constant predicates and edges labelled with * or a constant - and are compiled together, so the
+# predicates, vertex filters, and filtered edges they share are each computed once per document
+# results match SQL.ml's (tests/sql-image.json records them), except that SQL.ml can't evaluate edges labelled *,
+# which here match an edge of any label
+
+# quoting, with values written the way Core.Value.to_string writes them
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def literal(value):
+    if value is None: return "NULL"
+    if isinstance(value, bool): return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)): return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+# a vertex label, as a canonical tuple of (attribute, value) pairs
+def filter_of_json(json_rep):
+    predicates = set()
+    for predicate in json_rep:
+        if predicate.get('kind') != 'constant':
+            raise ValueError(f"unsupported predicate {predicate}")
+        predicates.add((predicate['attribute'], literal(predicate['value'])))
+    return tuple(sorted(predicates))
+
+# an edge label, None standing for *
+def kinder_of_json(json_rep):
+    if json_rep.get('kind') == '*': return None
+    if json_rep.get('kind') == 'constant': return str(json_rep['constant'])
+    raise ValueError(f"unsupported edge label {json_rep}")
+
+# the shared temporary tables every motif query is written against
+class Plan:
+    def __init__(self, motifs):
+        self.motifs = list(motifs)
+        # atoms in the order they have to be built, each key mapping to its table
+        self._predicates, self._filters, self._edges = {}, {}, {}
+        # distinct queries, and the query for each motif - motifs equal up to renaming share a query
+        self.queries, self._query_indices, self.motif_queries = [], {}, []
+        for motif in self.motifs:
+            query = self.compile(motif)
+            if query not in self._query_indices:
+                self._query_indices[query] = len(self.queries)
+                self.queries.append(query)
+            self.motif_queries.append(self._query_indices[query])
+
+    def _atom(self, atoms, key):
+        if key not in atoms:
+            atoms[key] = len(atoms)
+        return atoms[key]
+
+    def filter(self, predicates):
+        for predicate in predicates:
+            self._atom(self._predicates, predicate)
+        return self._atom(self._filters, predicates)
+
+    def edge(self, source, label, destination):
+        return self._atom(self._edges, (source, label, destination))
+
+    # the query selecting a motif's image - written only in terms of atoms, never vertex identifiers
+    def compile(self, motif):
+        selector, structure = motif['selector'], motif['structure']
+        filters = {vertex['identifier'] : self.filter(filter_of_json(vertex['label'])) for vertex in structure['vertices']}
+        tables, conditions, columns = [], [], {}
+
+        # vertices are bound to the first column they appear in, and every other appearance must agree
+        def bind(vertex, column):
+            if vertex in columns:
+                conditions.append(f"{column} = {columns[vertex]}")
+            else:
+                columns[vertex] = column
+
+        for edge in structure['edges']:
+            source, destination = edge['source'], edge['destination']
+            alias = f"a{len(tables)}"
+            # SQL.ml selects a self-loop as "source AS v, target AS v", and the natural join only ever sees the
+            # first of the two columns - so a self-loop asks for an outgoing edge, and the target goes unconstrained
+            loop = source == destination
+            atom = self.edge(filters.get(source), kinder_of_json(edge['label']), None if loop else filters.get(destination))
+            tables.append(f"temp.motif_edges AS {alias}")
+            conditions.append(f"{alias}.atom = {atom}")
+            bind(source, f"{alias}.source")
+            if not loop:
+                bind(destination, f"{alias}.target")
+        # labelled vertices without edges only need to exist
+        for vertex, atom in filters.items():
+            if vertex not in columns:
+                alias = f"a{len(tables)}"
+                tables.append(f"temp.motif_filters AS {alias}")
+                conditions.append(f"{alias}.atom = {atom}")
+                columns[vertex] = f"{alias}.identifier"
+
+        # a selector that's constrained by nothing selects nothing
+        if selector not in columns:
+            return None
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"SELECT DISTINCT {columns[selector]} FROM {', '.join(tables)}{where}"
+
+    # build every atom in a connected document - tables the document doesn't have match nothing
+    # atoms of each kind share a table, keyed by atom, so the schema only changes a handful of times
+    def materialize(self, connection):
+        tables = {}
+        for name, in connection.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'"):
+            tables[name] = {row[1] for row in connection.execute(f"PRAGMA main.table_info({quote(name)})")}
+        edge_tables = sorted(name for name, columns in tables.items() if {'source', 'target'} <= columns)
+
+        connection.executescript("""
+            CREATE TEMP TABLE motif_predicates (atom INTEGER, id INTEGER, PRIMARY KEY (atom, id)) WITHOUT ROWID;
+            CREATE TEMP TABLE motif_filters (atom INTEGER, identifier INTEGER, PRIMARY KEY (atom, identifier)) WITHOUT ROWID;
+            CREATE TEMP TABLE motif_edges (atom INTEGER, source INTEGER, target INTEGER, PRIMARY KEY (atom, source, target)) WITHOUT ROWID;
+        """)
+        connection.execute("BEGIN")
+        for (attribute, value), atom in self._predicates.items():
+            if attribute in tables:
+                connection.execute(
+                    f"INSERT OR IGNORE INTO temp.motif_predicates SELECT {atom}, id FROM main.{quote(attribute)} WHERE value = {value}"
+                )
+
+        for predicates, atom in self._filters.items():
+            memberships = ''.join(
+                f" AND identifier IN (SELECT id FROM temp.motif_predicates WHERE atom = {self._predicates[predicate]})"
+                for predicate in predicates
+            )
+            connection.execute(
+                f"INSERT OR IGNORE INTO temp.motif_filters SELECT {atom}, identifier FROM main.vertex WHERE TRUE{memberships}"
+            )
+
+        for (source, label, destination), atom in self._edges.items():
+            labels = edge_tables if label is None else [label] if label in edge_tables else []
+            for label_table in labels:
+                joins = ''
+                if source is not None:
+                    joins += f" JOIN temp.motif_filters AS s ON s.atom = {source} AND s.identifier = e.source"
+                if destination is not None:
+                    joins += f" JOIN temp.motif_filters AS d ON d.atom = {destination} AND d.identifier = e.target"
+                connection.execute(
+                    f"INSERT OR IGNORE INTO temp.motif_edges SELECT {atom}, e.source, e.target "
+                    f"FROM main.{quote(label_table)} AS e{joins}"
+                )
+        connection.execute("COMMIT")
+        # edges are joined from either end
+        connection.execute("CREATE INDEX temp.motif_edges_target ON motif_edges (atom, target, source)")
+        connection.execute("ANALYZE temp")
+
+    # the image of every distinct query in a single document
+    def evaluate(self, filename):
+        uri = f"file:{pathname2url(os.path.abspath(filename))}?mode=ro&immutable=1"
+        connection = sqlite3.connect(uri, uri=True)
+        try:
+            self.materialize(connection)
+            return [
+                [] if query is None else sorted(row[0] for row in connection.execute(query))
+                for query in self.queries
+            ]
+        finally:
+            connection.close()
+
+# the plan each worker evaluates, sent once when the worker starts
+PLAN = None
+
+def _set_plan(plan):
+    global PLAN
+    PLAN = plan
+
+def _evaluate(filename):
+    return filename, PLAN.evaluate(filename)
+
+# evaluate every motif in every file, giving rows in the image format Motif.of_json reads
+def evaluate_motifs(motifs, filenames, processes=1):
+    plan = Plan(motifs)
+    images = [[] for _ in plan.motifs]
+    if processes > 1:
+        from multiprocessing import Pool
+        pool = Pool(processes, initializer=_set_plan, initargs=(plan,))
+        results = pool.imap(_evaluate, filenames)
+    else:
+        pool, results = None, ((filename, plan.evaluate(filename)) for filename in filenames)
+    try:
+        for filename, query_images in results:
+            for motif_images, query in zip(images, plan.motif_queries):
+                motif_images.append({'file' : filename, 'image' : query_images[query]})
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [{'motif' : motif, 'images' : motif_images} for motif, motif_images in zip(plan.motifs, images)]
+
+# the same interface as ./evaluate, with the documents taken from a problem file or a directory
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="python -m analysis.sql")
+    parser.add_argument("--motifs", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--problem", default=None)
+    parser.add_argument("--db-directory", default=None)
+    parser.add_argument("--jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.problem is not None:
+        with open(args.problem, 'r') as f:
+            filenames = json.load(f)['files']
+    elif args.db_directory is not None:
+        filenames = [os.path.join(args.db_directory, name) for name in sorted(os.listdir(args.db_directory)) if name.endswith('.db')]
+    else:
+        parser.error("one of --problem or --db-directory is required")
+
+    with open(args.motifs, 'r') as f:
+        motifs = json.load(f)
+
+    with open(args.output, 'w') as f:
+        f.write('[')
+        for i, row in enumerate(evaluate_motifs(motifs, filenames, processes=args.jobs)):
+            if i > 0: f.write(',\n')
+            json.dump(row, f)
+        f.write(']')
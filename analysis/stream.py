@@ -0,0 +1,123 @@
+import json, time
+from .motif import Motif, Row
+
+# reading the json lines images ./evaluate --stream writes, as they're written
+# every motif comes first, as {"motif": j, "definition": ...}, then a {"motif": j, "file": ..., "image": [...]}
+# record per motif for each file in turn, then {"done": number of files} once every file has been evaluated
+STREAM_SUFFIX = '.jsonl'
+
+def is_stream(filename):
+    return str(filename).endswith(STREAM_SUFFIX)
+
+# the records in a stream - with follow, a file still being written is waited on (like tail -f) until its done
+# record, or until the writer (a subprocess, if given) has exited, or nothing has arrived for timeout seconds
+# (pipes need no following, as reading one already waits for the writer) - a stream that stops short of its done
+# record is incomplete, which is for the caller to notice
+def iter_records(f, follow=False, poll=0.1, timeout=300.0, writer=None):
+    partial, idle = "", 0.0
+    while True:
+        # anything the writer wrote before exiting is read before giving up on it
+        exited = writer is not None and writer.poll() is not None
+        line = f.readline()
+        # nothing new yet, or a line that's still being written
+        if follow and not line.endswith('\n'):
+            if line: idle = 0.0
+            elif exited or (timeout is not None and idle >= timeout): return
+            partial += line
+            time.sleep(poll)
+            idle += poll
+            continue
+        if not line: return
+        line, partial, idle = partial + line, "", 0.0
+        if not line.strip(): continue
+        record = json.loads(line)
+        yield record
+        if 'done' in record: return
+
+# an image built up as records arrive, keeping each motif's domain and the inverted index over them current,
+# so an ensemble over everything seen so far needs no pass over the image of its own
+class StreamingImage:
+    def __init__(self):
+        self.motifs = []
+        self.files = []
+        self.done = False
+        self._pending = 0
+        self._domains = []
+        self._index = {}
+
+    # add a single record, returning true if it completes a file
+    def add(self, record):
+        if 'done' in record:
+            self.done = True
+            return False
+        if 'definition' in record:
+            position = record['motif']
+            while len(self.motifs) <= position:
+                self.motifs.append(None)
+                self._domains.append(set())
+            self.motifs[position] = Motif(record['definition'], [])
+            return False
+
+        motif = self.motifs[record['motif']]
+        row = Row(record['file'], record['image'])
+        motif.rows.append(row)
+        # the motif's cached domain is out of date, and is refreshed from ours when next asked for
+        motif._domain = None
+        domain = self._domains[record['motif']]
+        for value in row.keys():
+            if value in domain: continue
+            domain.add(value)
+            if value in self._index:
+                self._index[value].append(motif)
+            else:
+                self._index[value] = [motif]
+
+        # files are written a block at a time, one record per motif
+        if not self.files or self.files[-1] != row.file:
+            self.files.append(row.file)
+            self._pending = len(self.motifs)
+        self._pending -= 1
+        return self._pending == 0
+
+    # consume records, yielding the number of files evaluated as each one completes
+    def consume(self, records):
+        for record in records:
+            if self.add(record):
+                yield len(self.files)
+
+    def _refresh(self):
+        for motif, domain in zip(self.motifs, self._domains):
+            if motif._domain is None:
+                motif._domain = frozenset(domain)
+
+    # the motifs as they stand, with domains up to date
+    def current_motifs(self):
+        self._refresh()
+        return self.motifs
+
+    # the motifs capturing a value, as it stands
+    def capturing(self, value):
+        return self._index.get(value, ())
+
+    # an ensemble over everything seen so far - once the stream is done the index is handed over as is, but
+    # before then the ensemble gets a copy of every motif, so records arriving later can't change it
+    def ensemble(self, cls):
+        self._refresh()
+        if self.done:
+            return cls(self.motifs, value_index=self._index)
+        motifs = []
+        for motif in self.motifs:
+            copy = Motif(motif.motif, list(motif.rows), motif.multiplicity)
+            copy._domain = motif._domain
+            motifs.append(copy)
+        return cls(motifs)
+
+# read a whole stream, as load_motifs reads an image
+def read_stream(filename, follow=False, timeout=300.0, writer=None):
+    image = StreamingImage()
+    with open(filename, 'r') as f:
+        for record in iter_records(f, follow=follow, timeout=timeout, writer=writer):
+            image.add(record)
+    if not image.done:
+        raise ValueError(f"stream {filename} ends before every file was evaluated")
+    return image
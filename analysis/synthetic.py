@@ -0,0 +1,49 @@
+import json, random
+
+# the root images every synthetic motif is nested under, each covering its own few documents
+def synthetic_roots(rng, files, values, rows, roots, density):
+    filenames = [f"synthetic/{i}.db" for i in range(files)]
+    root_size = max(1, int(values * density))
+    root_images = [
+        {filename : rng.sample(range(values), root_size) for filename in rng.sample(filenames, min(rows, files))}
+        for _ in range(max(1, roots))
+    ]
+    return filenames, root_images
+
+# seeded generator for image files in the format Motif.of_json reads
+#   motifs - number of motifs
+#   files - number of documents the image covers
+#   values - identifiers per document
+#   rows - documents each motif has an image in
+#   roots - number of root images, every motif is nested under one of them
+#   density - fraction of a document's values in a root image
+#   noise - fraction of a motif's image drawn from outside its root, breaking the nesting
+def synthetic_image(motifs=1000, files=10, values=1000, rows=3, roots=10, density=0.1, noise=0.0, seed=0):
+    rng = random.Random(seed)
+    _, root_images = synthetic_roots(rng, files, values, rows, roots, density)
+    for i in range(motifs):
+        root = rng.choice(root_images)
+        # prefixes of the root nest inside one another, so the frontier stays small without noise
+        fraction = rng.random()
+        images = []
+        for filename, root_image in root.items():
+            image = set(root_image[:max(1, int(len(root_image) * fraction))])
+            if noise > 0:
+                image.update(rng.sample(range(values), int(len(image) * noise)))
+            images.append({'file' : filename, 'image' : sorted(image)})
+        yield {'motif' : {'synthetic' : i, 'seed' : seed}, 'images' : images}
+
+# ground truth for the same documents - the first root, so ensembles have something to find
+def synthetic_ground_truth(files=10, values=1000, rows=3, roots=10, density=0.1, seed=0, **_):
+    filenames, root_images = synthetic_roots(random.Random(seed), files, values, rows, roots, density)
+    truth = root_images[0]
+    return [{'file' : filename, 'example' : sorted(truth.get(filename, []))} for filename in filenames]
+
+# write an image motif by motif, so large images never sit in memory
+def write_image(filename, **parameters):
+    with open(filename, 'w') as f:
+        f.write('[')
+        for i, motif in enumerate(synthetic_image(**parameters)):
+            if i > 0: f.write(',\n')
+            json.dump(motif, f)
+        f.write(']')
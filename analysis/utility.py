@@ -1,26 +1,40 @@
-from pandas import read_csv
 from os.path import splitext, basename
+from .interner import INTERNER
 
-# load ground truth as a big set, and an index mapping each value to the file it came from
+# load ground truth as a big set of interned values, and an index mapping each value to the file it came from
 def load_ground_truth(json):
     source = {}
     image = set()
 
     # iterate over every row
     for row in json:
-        for value in row['example']:
+        for value in INTERNER.intern_all(INTERNER.file(row['file']), row['example']):
             image.add(value)
             source[value] = row['file']
 
     return image, source
 
-# load prc data
-def load_prc(filepath):
+# load prc data (or any other experiment results), from csv or columnar .npz, tagged with the file's name
+# tags are categorical, and share their categories when given, so frames for many runs concatenate cheaply
+def load_prc(filepath, tags=None):
+    import numpy as np
+    from pandas import read_csv, DataFrame, Categorical
+    from .results import is_columnar, read_columns
     tag = splitext(basename(filepath))[0]
     # load the frame
-    frame = read_csv(filepath)
+    if is_columnar(filepath):
+        frame = DataFrame(read_columns(filepath), copy=False)
+    else:
+        frame = read_csv(filepath)
     # add the tag as a new column
-    tag_column = [tag for _ in frame['value']]
-    frame['tag'] = tag_column
+    categories = [tag] if tags is None else list(tags)
+    codes = np.full(len(frame), categories.index(tag), dtype=np.int32)
+    frame['tag'] = Categorical.from_codes(codes, categories=categories)
 
-    return frame
\ No newline at end of file
+    return frame
+
+# load and concatenate the results of many runs
+def load_prcs(filepaths):
+    from pandas import concat
+    tags = list(dict.fromkeys(splitext(basename(filepath))[0] for filepath in filepaths))
+    return concat([load_prc(filepath, tags=tags) for filepath in filepaths], ignore_index=True, sort=False)
@@ -1,45 +1,83 @@
 let output_file = ref ""
 let problem_file = ref ""
 let motif_file = ref ""
+let stream = ref false
 
 let spec_list = [
     ("--problem", Arg.Set_string problem_file, "Problem declaration file");
     ("--output", Arg.Set_string output_file, "Output file");
     ("--motifs", Arg.Set_string motif_file, "Synthesized motifs");
+    ("--stream", Arg.Set stream, "Write the output as JSON Lines, a record per file and motif as each file is evaluated (with --output - for stdout)");
 ]
 
 let usage_msg = "Motif Evaluation for Hera"
 let _ = Arg.parse spec_list print_endline usage_msg
 
-let _ = print_endline "Starting evaluation..."
+(* progress goes to stderr when the image is being streamed to stdout *)
+let to_stdout = !stream && !output_file = "-"
+let say fmt = Printf.ksprintf (fun s ->
+    if to_stdout then (prerr_string s; flush stderr) else (print_string s; flush stdout)
+) fmt
+
+let _ = say "Starting evaluation...\n"
 
 (* load the problem file and get the filepaths to evaluate *)
-let _ = print_string "Loading files..."
+let _ = say "Loading files..."
 let files = !problem_file
     |> Yojson.Basic.from_file
     |> Domain.Problem.of_json
     |> CCOpt.map Domain.Problem.files
     |> CCOpt.get_exn
 let num_files = CCList.length files
-let _ = Printf.printf "found %d files.\n" num_files
+let _ = say "found %d files.\n" num_files
 
 (* load the motifs *)
-let _ = print_string "Loading motifs..."
+let _ = say "Loading motifs..."
 let motifs = !motif_file
     |> Yojson.Basic.from_file
     |> Utility.JSON.list Matcher.Motif.of_json
     |> CCOpt.get_exn
-let _ = Printf.printf "found %d motifs.\n" (CCList.length motifs)
-
-(* now build the sparse image *)
-let _ = print_endline "Building image..."
-let sparse_image = ref (Domain.SparseImage.of_motifs motifs)
-let _ = CCList.iteri (fun i -> fun filename ->
-    let _ = Printf.printf "Evaluating %s (%d/%d)\n%!" filename i num_files in
-    let db = Domain.SQL.of_string filename in
-    let images = CCList.map (Domain.SQL.evaluate db) motifs in
-    let _ = Domain.SQL.close db in
-    sparse_image := Domain.SparseImage.add_results filename images !sparse_image
-) files
-let _ = Yojson.Basic.to_file !output_file (Domain.SparseImage.to_json !sparse_image)
-let _ = Printf.printf "...done. Output written to %s\n" !output_file
\ No newline at end of file
+let _ = say "found %d motifs.\n" (CCList.length motifs)
+
+(* build the sparse image in memory, and write it all at once *)
+let build_image () =
+    let _ = say "Building image...\n" in
+    let sparse_image = ref (Domain.SparseImage.of_motifs motifs) in
+    let _ = CCList.iteri (fun i -> fun filename ->
+        let _ = say "Evaluating %s (%d/%d)\n" filename i num_files in
+        let db = Domain.SQL.of_string filename in
+        let images = CCList.map (Domain.SQL.evaluate db) motifs in
+        let _ = Domain.SQL.close db in
+        sparse_image := Domain.SparseImage.add_results filename images !sparse_image
+    ) files in
+    let _ = Yojson.Basic.to_file !output_file (Domain.SparseImage.to_json !sparse_image) in
+        say "...done. Output written to %s\n" !output_file
+
+(* or write each result as soon as it's known - readers see every motif first, then each file's
+   results as a block (flushed once the file is done), then a final record once every file is *)
+let write_record channel json =
+    let _ = Yojson.Basic.to_channel channel json in
+        output_char channel '\n'
+
+let stream_image () =
+    let _ = say "Streaming image...\n" in
+    let channel = if to_stdout then stdout else open_out !output_file in
+    let _ = CCList.iteri (fun j -> fun motif ->
+        write_record channel (Domain.SparseImage.definition_to_json j motif)
+    ) motifs in
+    let _ = flush channel in
+    let _ = CCList.iteri (fun i -> fun filename ->
+        let _ = say "Evaluating %s (%d/%d)\n" filename i num_files in
+        let db = Domain.SQL.of_string filename in
+        let _ = CCList.iteri (fun j -> fun motif ->
+            let image = Domain.SQL.evaluate db motif in
+                write_record channel (Domain.SparseImage.result_to_json j (filename, image))
+        ) motifs in
+        let _ = Domain.SQL.close db in
+            flush channel
+    ) files in
+    let _ = write_record channel (`Assoc [("done", `Int num_files)]) in
+    let _ = if to_stdout then flush channel else close_out channel in
+        say "...done. Output streamed to %s\n" !output_file
+
+let _ = if !stream then stream_image () else build_image ()
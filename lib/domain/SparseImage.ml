@@ -22,4 +22,16 @@ let of_motifs motifs = CCList.map (fun m -> (m, [])) motifs
 let add_results filename images sparse = CCList.map2
     (fun img -> fun (m, imgs) ->
         (m, (filename, img) :: imgs)
-    ) images sparse
\ No newline at end of file
+    ) images sparse
+
+(* streaming - motifs are written once, by position, and results refer back to them *)
+let definition_to_json index motif = `Assoc [
+    ("motif", `Int index);
+    ("definition", Matcher.Motif.to_json motif)
+]
+
+let result_to_json index (filename, ids) = `Assoc [
+    ("motif", `Int index);
+    ("file", `String filename);
+    ("image", `List (CCList.map Core.Identifier.to_json ids))
+]
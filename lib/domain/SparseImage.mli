@@ -5,4 +5,7 @@ type t = sparse_row list
 
 val to_json : t -> Yojson.Basic.t
 val of_motifs : Matcher.Motif.t list -> t
-val add_results : filename -> (Core.Identifier.t list) list -> t -> t
\ No newline at end of file
+val add_results : filename -> (Core.Identifier.t list) list -> t -> t
+
+val definition_to_json : int -> Matcher.Motif.t -> Yojson.Basic.t
+val result_to_json : int -> image -> Yojson.Basic.t
@@ -0,0 +1,138 @@
+import json, os, platform, subprocess, sys, tempfile, time, tracemalloc
+from argparse import ArgumentParser, SUPPRESS
+from datetime import datetime, timezone
+from analysis import Active, Count, load_motifs, load_ground_truth, prc_curve
+from analysis.ensemble.frontier import frontier
+from analysis.synthetic import write_image, synthetic_ground_truth
+
+# each scale is a set of synthetic_image parameters
+SCALES = {
+    'small' : {'motifs': 1000, 'files': 10, 'values': 1000, 'rows': 3, 'roots': 10, 'density': 0.1, 'noise': 0.05},
+    'medium' : {'motifs': 10000, 'files': 50, 'values': 2000, 'rows': 5, 'roots': 50, 'density': 0.1, 'noise': 0.05},
+    'large' : {'motifs': 100000, 'files': 100, 'values': 5000, 'rows': 5, 'roots': 200, 'density': 0.05, 'noise': 0.05}
+}
+
+parser = ArgumentParser()
+parser.add_argument("--scales", nargs="+", default=['small', 'medium'], choices=list(SCALES.keys()))
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--output-dir", default="data/benchmarks")
+parser.add_argument("--compare", default=None)
+parser.add_argument("--no-memory", action="store_true", help="skip the pass measuring peak memory")
+# each scale runs in a process of its own - these say which, and where its results go
+parser.add_argument("--worker", default=None, help=SUPPRESS)
+parser.add_argument("--trace", action="store_true", help=SUPPRESS)
+parser.add_argument("--worker-output", default=None, help=SUPPRESS)
+
+args = parser.parse_args()
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# run a stage, recording its wall time - or, when tracing, the peak memory allocated while it ran
+# tracing slows allocation-heavy stages down considerably, so time and memory are measured in separate passes
+def measure(results, name, f, *fargs):
+    if args.trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value = f(*fargs)
+    seconds = time.perf_counter() - start
+    if args.trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {'peak-bytes' : peak}
+    else:
+        results[name] = {'seconds' : seconds}
+    return value
+
+def rank_every_value(ensemble):
+    return [ensemble.rank(value) for value in ensemble.domain()]
+
+def run_scale(parameters, directory):
+    results = {}
+    image = os.path.join(directory, 'image.json')
+    measure(results, 'generate', lambda: write_image(image, seed=args.seed, **parameters))
+    gt, _ = load_ground_truth(synthetic_ground_truth(seed=args.seed, **parameters))
+
+    motifs = measure(results, 'load_motifs', load_motifs, image)
+    measure(results, 'frontier', frontier, motifs)
+    ensemble = measure(results, 'ensemble', Count, motifs)
+    measure(results, 'rank', rank_every_value, ensemble)
+    # the incidence matrix is built once and then cached, so it's a stage of its own - and everything ranking
+    # in bulk is timed after it, against the cached matrix
+    measure(results, 'incidence', ensemble.incidence)
+    measure(results, 'rank_all', ensemble.rank_all)
+    measure(results, 'prc', lambda: len(prc_curve(ensemble, gt)))
+    active = Active(ensemble)
+    split = measure(results, 'candidate_split', active.candidate_split)
+    measure(results, 'split_on', active.split_on, split, split in gt)
+    return results
+
+# run one pass over a scale in a fresh interpreter, so no scale (or pass) inherits another's interned values
+def run_pass(scale, directory, trace=False):
+    output = os.path.join(directory, f"{scale}-{'memory' if trace else 'time'}.json")
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker', scale, '--worker-output', output, '--seed', str(args.seed)
+    ]
+    if trace: command.append('--trace')
+    subprocess.run(command, check=True)
+    with open(output, 'r') as f:
+        return json.load(f)
+
+# time every stage, then measure the peak memory of every stage
+def measure_scale(scale, directory):
+    results = run_pass(scale, directory)
+    if not args.no_memory:
+        for stage, measurement in run_pass(scale, directory, trace=True).items():
+            results[stage].update(measurement)
+    for measurement in results.values():
+        measurement.setdefault('peak-bytes', None)
+    return results
+
+def table(results, baseline=None):
+    print(f"{'scale':<8} {'stage':<16} {'seconds':>10} {'peak MiB':>10}" + (f" {'vs baseline':>12}" if baseline else ""))
+    for scale, stages in results.items():
+        for stage, measurement in stages.items():
+            peak = measurement['peak-bytes']
+            line = f"{scale:<8} {stage:<16} {measurement['seconds']:10.3f} {'-' if peak is None else f'{peak / 2 ** 20:.1f}':>10}"
+            if baseline and stage in baseline.get(scale, {}):
+                line += f" {measurement['seconds'] / max(baseline[scale][stage]['seconds'], 1e-9):11.2f}x"
+            print(line)
+
+# main
+if __name__ == "__main__":
+    if args.worker is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_scale(SCALES[args.worker], directory)
+        with open(args.worker_output, 'w') as f:
+            json.dump(results, f)
+        sys.exit(0)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            results[scale] = measure_scale(scale, directory)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)['results']
+    table(results, baseline)
+
+    # keyed by commit, so runs across the history can be lined up
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now(timezone.utc)
+    output = os.path.join(args.output_dir, f"{commit()}-{timestamp.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump({
+            'commit' : commit(),
+            'timestamp' : timestamp.isoformat(),
+            'python' : platform.python_version(),
+            'seed' : args.seed,
+            'memory' : not args.no_memory,
+            'scales' : {scale : SCALES[scale] for scale in args.scales},
+            'results' : results
+        }, f, indent=2)
+    print(f"Results written to {output}.")
@@ -0,0 +1,60 @@
+import random, time
+from argparse import ArgumentParser
+from analysis.motif import Motif, Row
+from analysis.ensemble.frontier import frontier, lt
+
+parser = ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+parser.add_argument("--values", type=int, default=10000)
+parser.add_argument("--domain-size", type=int, default=50)
+parser.add_argument("--naive-limit", type=int, default=5000)
+parser.add_argument("--seed", type=int, default=0)
+
+args = parser.parse_args()
+
+# the original pairwise implementation, kept for comparison
+def naive_frontier(motifs):
+    motifs = sorted(motifs, key=lambda m: len(m.domain()), reverse=True)
+    results = []
+    for motif in motifs:
+        ok = True
+        for other in motifs:
+            if motif.domain() != other.domain():
+                if lt(motif, other):
+                    ok = False
+                    break
+        if ok:
+            results.append(motif)
+    return results
+
+# random motifs, most of which are nested inside a handful of larger ones
+def synthetic_motifs(n, values, domain_size, rng):
+    roots = [rng.sample(range(values), domain_size) for _ in range(max(1, n // 100))]
+    motifs = []
+    for i in range(n):
+        root = rng.choice(roots)
+        image = set(rng.sample(root, rng.randint(1, domain_size)))
+        motifs.append(Motif(i, [Row("synthetic.db", image)]))
+    return motifs
+
+def timed(f, motifs):
+    start = time.perf_counter()
+    result = f(motifs)
+    return time.perf_counter() - start, len(result)
+
+# main
+if __name__ == "__main__":
+    rng = random.Random(args.seed)
+    print(f"{'motifs':>10} {'frontier':>10} {'indexed (s)':>12} {'naive (s)':>12}")
+    for size in args.sizes:
+        motifs = synthetic_motifs(size, args.values, args.domain_size, rng)
+        # warm the cached domains so both implementations see the same motifs
+        for motif in motifs: motif.domain()
+        indexed_time, frontier_size = timed(frontier, motifs)
+        if size <= args.naive_limit:
+            naive_time, naive_size = timed(naive_frontier, motifs)
+            assert naive_size == frontier_size
+            naive = f"{naive_time:12.3f}"
+        else:
+            naive = f"{'-':>12}"
+        print(f"{size:>10} {frontier_size:>10} {indexed_time:12.3f} {naive}")
@@ -0,0 +1,66 @@
+import glob, os, re, subprocess, sys
+from argparse import ArgumentParser
+
+# every entry point is timed as it's really run - each evaluate and plot script, and the runner, asked for --help
+# (so everything they import at the top is imported, and nothing else) - and none may pull in a heavy module
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+HEAVY = ['numpy', 'scipy', 'pandas', 'matplotlib', 'seaborn', 'difflib']
+
+def entry_points():
+    commands = {'analysis' : ['-m', 'analysis']}
+    for directory in ('evaluate', 'plot'):
+        for script in sorted(glob.glob(os.path.join(REPOSITORY, 'scripts', directory, '*.py'))):
+            commands[os.path.splitext(os.path.basename(script))[0]] = [script]
+    return commands
+
+ENTRY_POINTS = entry_points()
+
+parser = ArgumentParser()
+parser.add_argument("--entry-points", nargs="+", default=list(ENTRY_POINTS.keys()), choices=list(ENTRY_POINTS.keys()))
+parser.add_argument("--budget", type=float, default=50.0, help="milliseconds allowed per entry point")
+parser.add_argument("--repeat", type=int, default=5)
+
+args = parser.parse_args()
+
+# -X importtime writes "import time: self [us] | cumulative | imported package" lines to stderr
+IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# the cumulative time of every module the command imports, and which of them were imported at the top level
+def importtime(command):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *command, '--help'],
+        capture_output=True, text=True, check=True, cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY)
+    )
+    modules, top_level = {}, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+            # nested imports are indented under whatever imported them
+            if len(match.group(3)) == 1: top_level.add(match.group(4))
+    return modules, top_level
+
+# submodules loaded through the package's lazy __getattr__ are imported at the top level, after the package
+# itself, so the package's cost is every top-level analysis module (each including whatever it imported)
+def analysis_time(run):
+    modules, top_level = run
+    return sum(
+        modules[module] for module in top_level if module == 'analysis' or module.startswith('analysis.')
+    )
+
+# main
+if __name__ == "__main__":
+    failures = []
+    width = max(len(name) for name in ENTRY_POINTS) + 1
+    print(f"{'entry point':<{width}} {'analysis (ms)':>14} {'heavy modules':<30}")
+    for name in args.entry_points:
+        # take the best of a few runs, the import cache makes the first noisy
+        runs = [importtime(ENTRY_POINTS[name]) for _ in range(args.repeat)]
+        milliseconds = min(analysis_time(run) for run in runs) / 1000
+        heavy = sorted({module for modules, _ in runs for module in modules if module in HEAVY})
+        print(f"{name:<{width}} {milliseconds:14.1f} {', '.join(heavy) or '-':<30}")
+        if heavy: failures.append(f"{name} imports {', '.join(heavy)}")
+        if milliseconds > args.budget: failures.append(f"{name} takes {milliseconds:.1f}ms, over the {args.budget}ms budget")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
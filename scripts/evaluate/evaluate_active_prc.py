@@ -1,9 +1,6 @@
-import json, csv
 from argparse import ArgumentParser
-from functools import reduce
-
-from analysis import Active, Motif, load_ground_truth, performance_statistics, prc, load_motifs
-from analysis import ensemble_from_string
+from analysis.experiment import Workspace, evaluate_active_prc
+from analysis.instrument import enable
 
 parser = ArgumentParser()
 parser.add_argument("--ground-truth", required=True)
@@ -11,43 +8,24 @@ parser.add_argument("--image", required=True)
 parser.add_argument("--output", required=True)
 parser.add_argument("--ensemble", default="disjunction")
 parser.add_argument("--learning-steps", type=int, default=1)
+parser.add_argument("--summary", action="store_true", help="write per-step curve summaries instead of full curves")
+parser.add_argument("--curve", default=None, help="with --summary, also write the full curves here")
+parser.add_argument("--profile", nargs="?", const=True, default=None)
 
 args = parser.parse_args()
 
+# record per-stage timings, writing the trace to the given path (if any)
+if args.profile is not None:
+    enable(output=None if args.profile is True else args.profile)
+
 # main
 if __name__ == "__main__":
-    # load the ground truth
-    with open(args.ground_truth, 'r') as f:
-        gt, _ = load_ground_truth(json.load(f))
-
-    # load the image
-    motifs = load_motifs(args.image)
-
-    # make the ensemble
-    ensemble = ensemble_from_string(args.ensemble)(motifs)
-
-    # for some statistics
-    number_of_motifs = len(motifs)
-    
-    # open the output file and fake active learning here
-    with open(args.output, 'w') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'learning-step', 'ensemble-ratio', 'precision', 'recall', 'ranking', 'gt', 'value'
-        ])
-        writer.writeheader()
-
-        # make the active loop
-        active = Active(ensemble)
-
-        # for each step of the learning...
-        for step in range(args.learning_steps):
-            results = prc(active.ensemble, gt)
-            for row in results:
-                row['learning-step'] = step
-                row['ensemble-ratio'] = active.ensemble.size / number_of_motifs
-                writer.writerow(row)
-
-            # update the motifs by faking a learning loop
-            split = active.candidate_split()
-            if split is None: break
-            active = active.split_on(split, split in gt)
\ No newline at end of file
+    # load the ground truth and the image, and make the ensemble
+    workspace = Workspace()
+    gt = workspace.ground_truth(args.ground_truth)
+
+    # the shared experiment, also run by python -m analysis
+    evaluate_active_prc(
+        workspace.ensemble(args.image, args.ensemble), gt, args.output,
+        learning_steps=args.learning_steps, summary=args.summary, curve=args.curve
+    )
\ No newline at end of file
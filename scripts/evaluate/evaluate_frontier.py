@@ -1,43 +1,25 @@
-import json, csv
 from argparse import ArgumentParser
-from analysis import Motif, ensemble_from_string, load_ground_truth, prc
+from analysis.experiment import Workspace, evaluate_frontier
+from analysis.instrument import enable
 
 parser = ArgumentParser()
 parser.add_argument("--ground-truth", required=True)
 parser.add_argument("--image", required=True)
 parser.add_argument("--output", required=True)
 parser.add_argument("--ensemble", default="count")
+parser.add_argument("--profile", nargs="?", const=True, default=None)
 
 args = parser.parse_args()
 
+# record per-stage timings, writing the trace to the given path (if any)
+if args.profile is not None:
+    enable(output=None if args.profile is True else args.profile)
+
 # main
 if __name__ == "__main__":
-    # load the ground truth
-    with open(args.ground_truth, 'r') as f:
-        gt, _ = load_ground_truth(json.load(f))
-
-    # load the image
-    motifs = []
-    with open(args.image, 'r') as f:
-        for motif in json.load(f):
-            motifs.append(Motif.of_json(motif))
-
-    # compute the ensemble
-    ensemble = ensemble_from_string(args.ensemble)(motifs)
-
-    # write out frontier and non-frontier results
-    with open(args.output, 'w') as f:
-        writer = csv.DictWriter(f, [
-            'frontier', 'precision', 'recall', 'ranking', 'gt', 'value'
-        ])
-        writer.writeheader()
+    # load the ground truth and the image, and make the ensemble
+    workspace = Workspace()
+    gt = workspace.ground_truth(args.ground_truth)
 
-        # evaluate prc for no frontier
-        for row in prc(ensemble, gt):
-            row['frontier'] = False
-            writer.writerow(row)
-        
-        # and for frontier
-        for row in prc(ensemble, gt, frontier=True):
-            row['frontier'] = True
-            writer.writerow(row)
\ No newline at end of file
+    # the shared experiment, also run by python -m analysis
+    evaluate_frontier(workspace.ensemble(args.image, args.ensemble), gt, args.output)
\ No newline at end of file
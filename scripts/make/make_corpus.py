@@ -0,0 +1,128 @@
+import sqlite3, hashlib, os, sys, time
+from argparse import ArgumentParser
+from urllib.request import pathname2url
+
+parser = ArgumentParser()
+parser.add_argument('--db-directory', required=True)
+parser.add_argument('--dataset', required=True)
+parser.add_argument('--output', required=True)
+
+args = parser.parse_args()
+
+# bookkeeping for incremental merges - one row per ingested document
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document text not null,
+    mtime integer not null,
+    size integer not null,
+    hash text not null,
+    primary key (document)
+)
+"""
+
+def content_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def tables(connection, schema='main'):
+    rows = connection.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    return [name for (name,) in rows]
+
+def columns(connection, table, schema='main'):
+    return [(row[1], row[2]) for row in connection.execute(f"PRAGMA {schema}.table_info({quote(table)})")]
+
+# mirror a document table in the corpus, with a leading document column and indexes for cross-document lookups
+def create_table(connection, table, table_columns):
+    definitions = ', '.join(f"{quote(name)} {kind}" for name, kind in table_columns)
+    connection.execute(f"CREATE TABLE {quote(table)} (document text not null, {definitions})")
+    names = [name for name, _ in table_columns]
+    # per-document access, in the shape of each table's primary key
+    connection.execute(f"CREATE INDEX {quote(table + '_document')} ON {quote(table)} (document, {quote(names[0])})")
+    # attribute tables are looked up by value, relation tables from either end
+    if 'value' in names:
+        connection.execute(f"CREATE INDEX {quote(table + '_value')} ON {quote(table)} (value, document)")
+    if 'target' in names:
+        connection.execute(f"CREATE INDEX {quote(table + '_target')} ON {quote(table)} (document, target)")
+
+def remove_document(connection, document):
+    for table in tables(connection):
+        connection.execute(f"DELETE FROM {quote(table)} WHERE document = ?", (document,))
+
+# copy every table of a document into the corpus (replacing what it held, if anything) and record it as ingested
+# - in a single transaction, so a failed copy leaves both the corpus and its bookkeeping as they were
+def ingest_document(connection, document, db_filepath, stat, digest, replace=False):
+    uri = f"file:{pathname2url(os.path.abspath(db_filepath))}?mode=ro&immutable=1"
+    # databases can't be attached inside a transaction
+    connection.execute("ATTACH DATABASE ? AS source", (uri,))
+    try:
+        with connection:
+            connection.execute("BEGIN")
+            if replace:
+                remove_document(connection, document)
+            existing = set(tables(connection))
+            for table in tables(connection, schema='source'):
+                table_columns = columns(connection, table, schema='source')
+                if table not in existing:
+                    create_table(connection, table, table_columns)
+                names = ', '.join(quote(name) for name, _ in table_columns)
+                connection.execute(
+                    f"INSERT INTO main.{quote(table)} (document, {names}) SELECT ?, {names} FROM source.{quote(table)}",
+                    (document,)
+                )
+            connection.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (document, stat.st_mtime_ns, stat.st_size, digest))
+    finally:
+        connection.execute("DETACH DATABASE source")
+
+# main
+if __name__ == "__main__":
+    db_root = os.path.join(args.db_directory, args.dataset)
+    # documents are named exactly as make_ground_truth.py names them
+    documents = {}
+    for filepath in sorted(os.listdir(db_root)):
+        if filepath.endswith('.db'):
+            documents[os.path.join(db_root, filepath)] = os.stat(os.path.join(db_root, filepath))
+
+    # opened as a uri, so the documents' read-only uris attach as uris too (rather than as oddly named files)
+    connection = sqlite3.connect(f"file:{pathname2url(os.path.abspath(args.output))}", uri=True)
+    connection.execute(SCHEMA)
+    known = {row[0] : row[1:] for row in connection.execute("SELECT document, mtime, size, hash FROM documents")}
+
+    start, ingested, skipped, removed = time.perf_counter(), 0, 0, 0
+    # documents that disappeared from the dataset
+    for document in known.keys() - documents.keys():
+        remove_document(connection, document)
+        connection.execute("DELETE FROM documents WHERE document = ?", (document,))
+        removed += 1
+    connection.commit()
+
+    for document, stat in documents.items():
+        # unchanged mtime and size means unchanged, otherwise fall back to the content
+        if document in known:
+            mtime, size, digest = known[document]
+            if (mtime, size) == (stat.st_mtime_ns, stat.st_size):
+                skipped += 1
+                continue
+            new_digest = content_hash(document)
+            if new_digest == digest:
+                with connection:
+                    connection.execute("UPDATE documents SET mtime = ?, size = ? WHERE document = ?",
+                        (stat.st_mtime_ns, stat.st_size, document))
+                skipped += 1
+                continue
+        else:
+            new_digest = content_hash(document)
+        ingest_document(connection, document, document, stat, new_digest, replace=document in known)
+        ingested += 1
+
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+    print(f"Merged {args.dataset} into {args.output} in {time.perf_counter() - start:.2f}s: "
+        f"{ingested} ingested, {skipped} unchanged, {removed} removed.", file=sys.stderr)
@@ -1,22 +1,87 @@
-import sqlite3, json, os
+import sqlite3, json, os, sys, time, csv
 from argparse import ArgumentParser
+from multiprocessing import Pool
+from urllib.request import pathname2url
 
 parser = ArgumentParser()
 parser.add_argument('--db-directory', required=True)
 parser.add_argument('--output', required=True)
 parser.add_argument('--experiment', required=True)
+parser.add_argument('--jobs', type=int, default=1)
+parser.add_argument('--timings', default=None)
+parser.add_argument('--corpus', default=None)
 
 args = parser.parse_args()
 
+# documents are never written to here, so sqlite can skip locking and change detection
+def connect(db_filepath):
+    uri = f"file:{pathname2url(os.path.abspath(db_filepath))}?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
 def process_db(db_filepath, sql):
     # connect to db
-    connection = sqlite3.connect(db_filepath)
-    cursor = connection.cursor()
+    connection = connect(db_filepath)
+    try:
+        # evaluate the sql and get results
+        for row in connection.execute(sql):
+            yield row[0]
+    finally:
+        connection.close()
+
+# evaluate a single document, keeping track of how long it took
+def process_job(job):
+    db_filepath, sql = job
+    start = time.perf_counter()
+    image = list(process_db(db_filepath, sql))
+    return db_filepath, image, time.perf_counter() - start
 
-    # evaluate the sql and get results
-    cursor.execute(sql)
-    for row in cursor.fetchall():
-        yield row[0]
+# evaluate against a merged corpus (see make_corpus.py) over a single connection
+def process_corpus(corpus_filepath, ground_truth):
+    connection = connect(corpus_filepath)
+    try:
+        documents = [row[0] for row in connection.execute("SELECT document FROM documents ORDER BY document")]
+        # sql written against the corpus returns (document, value) pairs, and runs exactly once
+        if 'corpus-sql' in ground_truth:
+            start = time.perf_counter()
+            rows = connection.execute(f"SELECT * FROM ({ground_truth['corpus-sql']}) ORDER BY 1")
+            row = next(rows, None)
+            # merge the sorted rows with the sorted documents, so documents without results still appear
+            for document in documents:
+                image = []
+                while row is not None and row[0] == document:
+                    image.append(row[1])
+                    row = next(rows, None)
+                yield document, image, time.perf_counter() - start
+                start = time.perf_counter()
+        # per-document sql runs against temporary views that shadow each table with one document's rows
+        else:
+            connection.execute("CREATE TEMP TABLE current_document (document text)")
+            connection.execute("INSERT INTO temp.current_document VALUES (NULL)")
+            tables = [row[0] for row in connection.execute(
+                "SELECT name FROM main.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != 'documents'"
+            )]
+            for table in tables:
+                names = [row[1] for row in connection.execute(f"PRAGMA main.table_info(\"{table}\")") if row[1] != 'document']
+                columns = ', '.join(f'"{name}"' for name in names)
+                connection.execute(
+                    f"CREATE TEMP VIEW \"{table}\" AS SELECT {columns} FROM main.\"{table}\" "
+                    f"WHERE document = (SELECT document FROM temp.current_document)"
+                )
+            for document in documents:
+                start = time.perf_counter()
+                connection.execute("UPDATE temp.current_document SET document = ?", (document,))
+                image = [row[0] for row in connection.execute(ground_truth['sql'])]
+                yield document, image, time.perf_counter() - start
+    finally:
+        connection.close()
+
+# write results out as they arrive, so only one document's results are in memory at a time
+def write_ground_truth(f, results):
+    f.write('[')
+    for i, (db_filepath, image, _) in enumerate(results):
+        if i > 0: f.write(', ')
+        json.dump({'file': db_filepath, 'example': image}, f)
+    f.write(']')
 
 # main
 if __name__ == "__main__":
@@ -30,24 +95,49 @@ if __name__ == "__main__":
     # if we're provided, we'll just copy it over
     if kind == "provided":
         with open(args.output, 'w') as f:
-            ground_truth = data['ground-truth']['labels']
+            json.dump(data['ground-truth']['labels'], f)
+
+    # if we're given a sql command and a merged corpus, run it over the corpus
+    elif kind == "sql" and args.corpus is not None:
+        start, pool = time.perf_counter(), None
+        results = process_corpus(args.corpus, data['ground-truth'])
 
-    # if we're given a sql command, get all the dbs and execute
+    # otherwise get all the dbs and execute
     elif kind == "sql":
         db_filepaths = []
         db_root = os.path.join(args.db_directory, data['ground-truth']['dataset'])
-        for filepath in os.listdir(db_root):
+        for filepath in sorted(os.listdir(db_root)):
             if filepath.endswith('.db'):
                 db_filepaths.append(os.path.join(db_root, filepath))
+        jobs = [(db_filepath, data['ground-truth']['sql']) for db_filepath in db_filepaths]
+
+        # fan the documents out over a pool - imap keeps the output in directory order
+        start = time.perf_counter()
+        pool = Pool(args.jobs) if args.jobs > 1 else None
+        results = pool.imap(process_job, jobs, chunksize=16) if pool else map(process_job, jobs)
+
+    if kind == "sql":
+        # record timings as results stream past on their way to the output
+        timings = []
+        def timed(results):
+            for db_filepath, image, seconds in results:
+                timings.append((db_filepath, len(image), seconds))
+                yield db_filepath, image, seconds
+        with open(args.output, 'w') as f:
+            write_ground_truth(f, timed(results))
+        if pool:
+            pool.close()
+            pool.join()
+        elapsed = time.perf_counter() - start
 
-        # construct json output
-        ground_truth = []
-        for db_filepath in db_filepaths:
-            image = list(process_db(db_filepath, data['ground-truth']['sql']))
-            ground_truth.append(
-                {'file': db_filepath, 'example': image}
-            )
-
-    # write the output
-    with open(args.output, 'w') as f:
-        json.dump(ground_truth, f)
\ No newline at end of file
+        # report per-file timings
+        if args.timings is not None:
+            with open(args.timings, 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(['file', 'results', 'seconds'])
+                writer.writerows(timings)
+        if timings:
+            slowest = max(timings, key=lambda t: t[-1])
+            print(f"Evaluated {len(timings)} files in {elapsed:.2f}s with {args.jobs} job(s) "
+                f"({sum(t[-1] for t in timings) / len(timings):.4f}s per file, slowest {slowest[0]} at {slowest[-1]:.4f}s).",
+                file=sys.stderr)
@@ -0,0 +1,15 @@
+from argparse import ArgumentParser
+from analysis.cache import compile_image, cache_path
+
+parser = ArgumentParser()
+parser.add_argument('--image', required=True)
+parser.add_argument('--output', default=None)
+
+args = parser.parse_args()
+
+# main
+if __name__ == "__main__":
+    # defaults to the location load_motifs checks
+    output = args.output if args.output is not None else cache_path(args.image)
+    compile_image(args.image, output)
+    print(f"Compiled {args.image} to {output}.")
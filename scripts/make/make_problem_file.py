@@ -5,6 +5,8 @@ parser = ArgumentParser()
 parser.add_argument("--ground-truth", required=True)
 parser.add_argument("--output", required=True)
 parser.add_argument("--experiment", required=True)
+parser.add_argument("--seed", type=int, default=None, help="seed for sampling examples (unseeded if absent)")
+parser.add_argument("--number-of-examples", type=int, default=None, help="overrides the experiment's number-of-examples")
 
 args = parser.parse_args()
 
@@ -22,13 +24,15 @@ if __name__ == "__main__":
     files = [elt['file'] for elt in ground_truth]
 
     # number of examples
-    if "number-of-examples" in experiment.keys():
+    if args.number_of_examples is not None:
+        number_of_examples = args.number_of_examples
+    elif "number-of-examples" in experiment.keys():
         number_of_examples = experiment["number-of-examples"]
     else:
         number_of_examples = 1
 
-    # sample the examples
-    examples = random.sample(
+    # sample the examples, reproducibly if we've been given a seed
+    examples = random.Random(args.seed).sample(
         population=list(
             filter(lambda elt: elt['example'] != [], ground_truth)
         ),
@@ -0,0 +1,240 @@
+import hashlib, json, os, subprocess, sys, time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import product
+
+# sweep experiments over sampling seeds and example counts, running the pipeline the Makefile describes
+# (ground truth -> problem -> motifs -> image -> results) as a dag of stages over a pool of workers
+# every artifact lives in the cache under a hash of its inputs, parameters, and the code producing it,
+# so reruns - and sweeps that overlap earlier ones - only do the work that hasn't been done yet
+
+parser = ArgumentParser()
+parser.add_argument('--experiment', nargs="+", required=True)
+parser.add_argument('--seeds', nargs="+", type=int, default=[0])
+parser.add_argument('--number-of-examples', nargs="+", type=int, default=None, help="defaults to each experiment's own")
+parser.add_argument('--evaluation', nargs="+", default=['disjunction:active', 'count:active-prc'], help="as ENSEMBLE:MODE")
+parser.add_argument('--learning-steps', type=int, default=7)
+parser.add_argument('--db-directory', default='data/db')
+parser.add_argument('--cache', default='data/cache')
+parser.add_argument('--synthesize', default='./synthesize')
+parser.add_argument('--evaluate', default='./evaluate')
+parser.add_argument('--jobs', type=int, default=1)
+parser.add_argument('--manifest', default=None, help="where to write the artifacts of each grid point")
+parser.add_argument('--dry-run', action='store_true')
+
+args = parser.parse_args()
+
+# everything is run from the repository root, so the analysis package and relative paths resolve
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MAKE = os.path.join(REPOSITORY, 'scripts', 'make')
+
+def digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+# content hashes of the code running each stage, computed once per file
+CODE_DIGESTS = {}
+def code_digest(*paths):
+    digests = []
+    for path in paths:
+        if path not in CODE_DIGESTS:
+            if os.path.isdir(path):
+                files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names if name.endswith('.py'))
+            else:
+                files = [path]
+            sha = hashlib.sha256()
+            for filename in files:
+                sha.update(os.path.relpath(filename, path).encode('utf-8'))
+                with open(filename, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        sha.update(chunk)
+            CODE_DIGESTS[path] = sha.hexdigest()
+        digests.append(CODE_DIGESTS[path])
+    return digests
+
+# databases are too big to hash on every run, so a dataset is identified by the name, size, and mtime of each db
+def dataset_digest(directory):
+    entries = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.db'):
+            stat = os.stat(os.path.join(directory, filename))
+            entries.append((filename, stat.st_size, stat.st_mtime_ns))
+    return digest(entries)
+
+# a single artifact, and the command producing it
+class Stage:
+    def __init__(self, name, suffix, inputs, parameters, code, command, output=None):
+        self.name = name
+        self.inputs = inputs
+        self.key = digest(name, parameters, [stage.key for stage in inputs], code_digest(*code))
+        self.output = output if output is not None else os.path.join(args.cache, name, self.key[:24] + suffix)
+        # the command writes to the temporary path given, which is moved into place once it succeeds
+        self._command = command
+        self._suffix = suffix
+
+    @property
+    def done(self):
+        return os.path.exists(self.output)
+
+    def temporary(self):
+        directory, filename = os.path.split(self.output)
+        return os.path.join(directory, f".{os.getpid()}-{filename}.tmp{self._suffix}")
+
+    def run(self):
+        os.makedirs(os.path.dirname(self.output), exist_ok=True)
+        temporary = self.temporary()
+        start = time.perf_counter()
+        try:
+            subprocess.run(
+                self._command(temporary), cwd=REPOSITORY, check=True,
+                env=dict(os.environ, PYTHONPATH=REPOSITORY), stdout=subprocess.DEVNULL
+            )
+            os.replace(temporary, self.output)
+        finally:
+            if os.path.exists(temporary): os.remove(temporary)
+        return time.perf_counter() - start
+
+# the stages of every grid point, with stages shared between points (and experiments) built only once
+class Sweep:
+    def __init__(self):
+        self.stages = {}
+
+    def stage(self, *stage_args, **stage_kwargs):
+        stage = Stage(*stage_args, **stage_kwargs)
+        return self.stages.setdefault(stage.key, stage)
+
+    def ground_truth(self, experiment_path, experiment):
+        ground_truth = experiment['ground-truth']
+        parameters = {'ground-truth' : ground_truth}
+        if ground_truth['kind'] == 'sql':
+            parameters['dataset'] = dataset_digest(os.path.join(args.db_directory, ground_truth['dataset']))
+        return self.stage('ground-truth', '.json', [], parameters, [os.path.join(MAKE, 'make_ground_truth.py')],
+            lambda output: [
+                sys.executable, os.path.join(MAKE, 'make_ground_truth.py'),
+                '--db-directory', args.db_directory,
+                '--experiment', experiment_path, '--output', output
+            ]
+        )
+
+    def problem(self, experiment_path, experiment, ground_truth, seed, number_of_examples):
+        parameters = {'metadata' : experiment['metadata'], 'seed' : seed, 'number-of-examples' : number_of_examples}
+        return self.stage('problem', '.json', [ground_truth], parameters, [os.path.join(MAKE, 'make_problem_file.py')],
+            lambda output: [
+                sys.executable, os.path.join(MAKE, 'make_problem_file.py'),
+                '--ground-truth', ground_truth.output, '--experiment', experiment_path, '--output', output,
+                '--seed', str(seed), '--number-of-examples', str(number_of_examples)
+            ]
+        )
+
+    def motifs(self, problem):
+        return self.stage('motifs', '.json', [problem], {}, [args.synthesize],
+            lambda output: [args.synthesize, '--problem', problem.output, '--output', output]
+        )
+
+    def image(self, problem, motifs):
+        return self.stage('image', '.json', [problem, motifs], {}, [args.evaluate],
+            lambda output: [args.evaluate, '--problem', problem.output, '--motifs', motifs.output, '--output', output]
+        )
+
+    # compiled next to the image, where load_motifs looks for it
+    def image_cache(self, image):
+        return self.stage('image-cache', '.cache', [image], {}, [os.path.join(MAKE, 'make_image_cache.py')],
+            lambda output: [
+                sys.executable, os.path.join(MAKE, 'make_image_cache.py'), '--image', image.output, '--output', output
+            ],
+            output=image.output + '.cache'
+        )
+
+    def results(self, ground_truth, image, image_cache, ensemble, mode):
+        parameters = {'ensemble' : ensemble, 'mode' : mode, 'learning-steps' : args.learning_steps}
+        return self.stage('results', '.csv', [ground_truth, image, image_cache], parameters, [os.path.join(REPOSITORY, 'analysis')],
+            lambda output: [
+                sys.executable, '-m', 'analysis', '--no-cache', '--job',
+                f"mode={mode},ensemble={ensemble},image={escape(image.output)},ground-truth={escape(ground_truth.output)},"
+                f"output={escape(output)},learning-steps={args.learning_steps}"
+            ]
+        )
+
+# --job values escape commas (and so backslashes) with a backslash
+def escape(value):
+    return value.replace('\\', '\\\\').replace(',', '\\,')
+
+# run every stage not yet in the cache, each as soon as everything it depends on is done
+def run(stages, jobs):
+    pending = [stage for stage in stages if not stage.done]
+    finished, failed, running = set(), set(), {}
+    print(f"{len(stages) - len(pending)} of {len(stages)} artifact(s) cached, {len(pending)} to make.", file=sys.stderr)
+    with ThreadPoolExecutor(max(1, jobs)) as executor:
+        while pending or running:
+            # nothing downstream of a failure can be made
+            blocked = [stage for stage in pending if any(dependency.key in failed for dependency in stage.inputs)]
+            while blocked:
+                for stage in blocked:
+                    pending.remove(stage)
+                    failed.add(stage.key)
+                blocked = [stage for stage in pending if any(dependency.key in failed for dependency in stage.inputs)]
+            for stage in list(pending):
+                if all(dependency.done for dependency in stage.inputs):
+                    pending.remove(stage)
+                    running[executor.submit(stage.run)] = stage
+            if not running: break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    seconds = future.result()
+                    finished.add(stage.key)
+                    print(f"Made {stage.name} {stage.output} in {seconds:.2f}s.", file=sys.stderr)
+                except (subprocess.CalledProcessError, OSError) as error:
+                    failed.add(stage.key)
+                    print(f"Failed to make {stage.name} {stage.output}: {error}", file=sys.stderr)
+    return len(finished), len(failed)
+
+# main
+if __name__ == "__main__":
+    # the tools are hashed, and run from the repository root, so pin down where they are
+    for tool in ('synthesize', 'evaluate'):
+        if not os.path.exists(getattr(args, tool)):
+            parser.error(f"no {tool} tool at {getattr(args, tool)}, build it with make {tool}")
+        setattr(args, tool, os.path.abspath(getattr(args, tool)))
+    args.cache, args.db_directory = os.path.abspath(args.cache), os.path.abspath(args.db_directory)
+
+    sweep, manifest = Sweep(), []
+    evaluations = [evaluation.split(':') for evaluation in args.evaluation]
+
+    for experiment_path in args.experiment:
+        experiment_path = os.path.abspath(experiment_path)
+        with open(experiment_path, 'r') as f:
+            experiment = json.load(f)
+        ground_truth = sweep.ground_truth(experiment_path, experiment)
+
+        # the grid for this experiment
+        counts = args.number_of_examples or [experiment.get('number-of-examples', 1)]
+        for seed, number_of_examples in product(args.seeds, counts):
+            problem = sweep.problem(experiment_path, experiment, ground_truth, seed, number_of_examples)
+            motifs = sweep.motifs(problem)
+            image = sweep.image(problem, motifs)
+            image_cache = sweep.image_cache(image)
+            results = {
+                f"{ensemble}:{mode}" : sweep.results(ground_truth, image, image_cache, ensemble, mode).output
+                for ensemble, mode in evaluations
+            }
+            manifest.append({
+                'experiment' : experiment_path, 'seed' : seed, 'number-of-examples' : number_of_examples,
+                'ground-truth' : ground_truth.output, 'problem' : problem.output, 'motifs' : motifs.output,
+                'image' : image.output, 'results' : results
+            })
+
+    if args.manifest is not None:
+        with open(args.manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    stages = list(sweep.stages.values())
+    if args.dry_run:
+        for stage in stages:
+            print(f"{'cached' if stage.done else 'make':<7} {stage.name:<12} {stage.output}")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    made, failures = run(stages, args.jobs)
+    print(f"Made {made} artifact(s) in {time.perf_counter() - start:.2f}s with {args.jobs} job(s), {failures} failed.", file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,25 @@
+import sys, time
+from argparse import ArgumentParser
+from analysis.plotting import Figure, KINDS, MAX_POINTS, render_all
+
+parser = ArgumentParser()
+parser.add_argument('--figure', nargs="+", action="append", required=True, metavar="KIND OUTPUT INPUT",
+    help=f"a figure to draw, from one or more inputs (kinds: {', '.join(KINDS)})")
+parser.add_argument('--jobs', type=int, default=1)
+parser.add_argument('--max-points', type=int, default=MAX_POINTS, help="most points drawn per curve, 0 for all")
+
+args = parser.parse_args()
+
+# main
+if __name__ == '__main__':
+    figures = []
+    for kind, output, *inputs in args.figure:
+        if kind not in KINDS or not inputs:
+            parser.error(f"expected --figure KIND OUTPUT INPUT..., with KIND one of {', '.join(KINDS)}")
+        figures.append(Figure(kind, inputs, output))
+
+    # every input is loaded once, however many figures use it
+    start = time.perf_counter()
+    for figure in render_all(figures, processes=args.jobs, max_points=args.max_points):
+        print(f"Drew {figure.output}", file=sys.stderr)
+    print(f"Drew {len(figures)} figure(s) in {time.perf_counter() - start:.2f}s with {args.jobs} job(s).", file=sys.stderr)
@@ -0,0 +1,33 @@
+import pytest
+from analysis.motif import Motif
+from analysis.synthetic import synthetic_image
+from analysis.interner import INTERNER
+from analysis.ensemble import Disjunction, Count
+from analysis.active import Active, inclusion_counts, maximal_count_entropy, count_entropy
+
+def synthetic_motifs(**parameters):
+    return [Motif.of_json(motif) for motif in synthetic_image(**parameters)]
+
+# the counts carried across each split must be exactly the counts a fresh pass would find
+@pytest.mark.parametrize('cls, frontier', [(Disjunction, False), (Count, False), (Count, True)])
+def test_carried_counts_match_fresh_counts(cls, frontier):
+    active = Active(cls(synthetic_motifs(motifs=400, values=150, noise=0.1, seed=4)))
+    for step in range(6):
+        value = active.candidate_split(frontier=frontier)
+        if value is None: break
+        active = active.split_on(value, step % 2 == 0)
+        carried = active._counts[frontier] if frontier in active._counts else active.counts(frontier=frontier)
+        assert carried == inclusion_counts(active.groups(frontier=frontier))
+
+# the split chosen is the maximal-entropy value with the smallest (file, identifier), whatever order the
+# counts were built in
+def test_ties_break_on_smallest_key():
+    motifs = synthetic_motifs(motifs=200, values=100, seed=6)
+    counts = inclusion_counts(motifs)
+    best = max(count_entropy(count, len(motifs)) for count in counts.values())
+    expected = min((value for value, count in counts.items() if count_entropy(count, len(motifs)) == best),
+        key=INTERNER.lookup)
+    assert Active(Disjunction(motifs)).candidate_split() == expected
+    assert Active(Disjunction(motifs[::-1])).candidate_split() == expected
+    reversed_counts = dict(reversed(list(counts.items())))
+    assert maximal_count_entropy(reversed_counts.keys(), reversed_counts, len(motifs), key=INTERNER.lookup)[0] == expected
@@ -0,0 +1,58 @@
+import pickle
+import pytest
+from analysis.motif import load_motifs
+from analysis.synthetic import write_image
+from analysis.ensemble import Ensemble, Disjunction, Count, MajorityVote, MostSpecific, WeightedVote, multiplicity
+
+@pytest.fixture
+def image(tmp_path):
+    filename = str(tmp_path / 'image.json')
+    write_image(filename, motifs=300, files=3, values=120, noise=0.1, seed=10)
+    return filename
+
+ENSEMBLES = [
+    Disjunction, Count, MajorityVote, MostSpecific, lambda motifs: WeightedVote(motifs, multiplicity)
+]
+
+@pytest.mark.parametrize('make', ENSEMBLES)
+def test_round_trip(tmp_path, image, make):
+    ensemble = make(load_motifs(image, unique=True))
+    path = str(tmp_path / 'ensemble.npz')
+    ensemble.save(path, source=image)
+    loaded = Ensemble.load(path, source=image)
+
+    assert type(loaded) is type(ensemble)
+    assert [motif.motif for motif in loaded.motifs] == [motif.motif for motif in ensemble.motifs]
+    assert [motif.multiplicity for motif in loaded.motifs] == [motif.multiplicity for motif in ensemble.motifs]
+    assert loaded.domain() == ensemble.domain()
+    assert {value : len(motifs) for value, motifs in loaded._index.items()} == \
+        {value : len(motifs) for value, motifs in ensemble._index.items()}
+    if hasattr(ensemble, '_lattice'):
+        assert [motif.motif for motif in loaded._frontier] == [motif.motif for motif in ensemble._frontier]
+        for frontier in (False, True):
+            assert loaded.top_k(20, frontier=frontier) == ensemble.top_k(20, frontier=frontier)
+        assert loaded._default_threshold == ensemble._default_threshold
+        # and it keeps filtering incrementally, as a freshly built one would
+        dropped = set(motif.motif['synthetic'] for motif in ensemble._frontier[:5])
+        filtered = loaded.filter(lambda motif: motif.motif['synthetic'] not in dropped)
+        rebuilt = type(ensemble)(filtered.motifs) if not isinstance(ensemble, WeightedVote) \
+            else WeightedVote(filtered.motifs, multiplicity)
+        assert filtered._frontier == rebuilt._frontier
+        assert filtered._frontier_index == rebuilt._frontier_index
+
+def test_stale_source(tmp_path, image):
+    path = str(tmp_path / 'ensemble.npz')
+    Count(load_motifs(image)).save(path, source=image)
+    write_image(image, motifs=300, files=3, values=120, noise=0.1, seed=11)
+    with pytest.raises(ValueError, match='stale'):
+        Ensemble.load(path, source=image)
+
+# artifacts are plain data, so neither an old pickled one nor an unnameable weight gets through
+def test_rejects_pickles_and_unnamed_weights(tmp_path, image):
+    path = str(tmp_path / 'ensemble.pickle')
+    with open(path, 'wb') as f:
+        pickle.dump({'version' : 1}, f)
+    with pytest.raises(ValueError):
+        Ensemble.load(path)
+    with pytest.raises(ValueError):
+        WeightedVote(load_motifs(image), lambda motif: 2.0).save(str(tmp_path / 'weighted.npz'))
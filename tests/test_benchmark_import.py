@@ -0,0 +1,35 @@
+import glob, os, subprocess, sys
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK = os.path.join(REPOSITORY, 'scripts', 'benchmark', 'benchmark_import.py')
+
+def benchmark(*options):
+    return subprocess.run([sys.executable, BENCHMARK, '--repeat', '1', *options], capture_output=True, text=True)
+
+# the entry points come from the scripts themselves, so a new script is benchmarked without touching the
+# benchmark - and none of them may pull in a heavy module just to start
+def test_every_script_is_benchmarked():
+    result = benchmark('--budget', '10000')
+    assert result.returncode == 0, result.stdout + result.stderr
+    scripts = glob.glob(os.path.join(REPOSITORY, 'scripts', 'evaluate', '*.py'))
+    scripts += glob.glob(os.path.join(REPOSITORY, 'scripts', 'plot', '*.py'))
+    names = {os.path.splitext(os.path.basename(script))[0] for script in scripts} | {'analysis'}
+    benchmarked = {line.split()[0] for line in result.stdout.splitlines()[1:]}
+    assert benchmarked == names
+
+def test_budget_is_enforced():
+    result = benchmark('--budget', '0', '--entry-points', 'analysis')
+    assert result.returncode == 1
+    assert 'over the 0.0ms budget' in result.stderr
+
+# every public name resolves, and using the core of the package never pulls in the heavy modules
+def test_lazy_exports():
+    code = (
+        "import sys, analysis\n"
+        "motifs = [analysis.Motif({}, [analysis.Row('f', [1, 2])])]\n"
+        "analysis.Count(motifs).rank(analysis.INTERNER.find('f', 1))\n"
+        "assert not {'numpy', 'scipy', 'pandas', 'matplotlib', 'seaborn'} & sys.modules.keys(), sys.modules.keys()\n"
+        "for name in analysis.__all__: getattr(analysis, name)\n"
+        "assert set(analysis.__all__) <= set(dir(analysis))\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY), check=True)
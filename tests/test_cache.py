@@ -0,0 +1,61 @@
+import os, struct
+import pytest
+from analysis.cache import cache_path, compile_image, open_cache, HEADER, VERSION
+from analysis.motif import load_motifs
+from analysis.synthetic import write_image
+
+@pytest.fixture
+def image(tmp_path):
+    filename = str(tmp_path / 'image.json')
+    write_image(filename, motifs=50, files=4, values=100, seed=0)
+    return filename
+
+def domains(motifs):
+    return [(motif.motif, motif.domain()) for motif in motifs]
+
+# ways a cache left over from an earlier run can be unreadable
+def bump_version(data):
+    return data[:8] + struct.pack('<Q', VERSION + 1) + data[16:]
+
+def truncate(data):
+    return data[:len(data) // 2]
+
+def cut_header(data):
+    return data[:HEADER.size - 1]
+
+def empty(data):
+    return b''
+
+@pytest.mark.parametrize('corrupt', [bump_version, truncate, cut_header, empty])
+def test_unreadable_cache_is_rebuilt(image, corrupt):
+    expected = domains(load_motifs(image))
+    compile_image(image)
+    with open(cache_path(image), 'rb') as f:
+        data = f.read()
+    with open(cache_path(image), 'wb') as f:
+        f.write(corrupt(data))
+
+    assert domains(load_motifs(image)) == expected
+    # and the cache was replaced with one that reads
+    with open(cache_path(image), 'rb') as f:
+        assert f.read() == data
+    assert open_cache(image) is not None
+
+def test_stale_cache_is_rebuilt(image):
+    compile_image(image)
+    write_image(image, motifs=60, files=4, values=100, seed=1)
+    os.utime(image, ns=(0, 0))
+    assert len(load_motifs(image)) == 60
+
+# a compiled image reads back as exactly the motifs the json holds, rows straight out of the map
+def test_compiled_matches_json(image):
+    expected = load_motifs(image)
+    compile_image(image)
+    compiled = open_cache(image)
+    assert len(compiled) == len(expected)
+    motifs = list(compiled)
+    assert [(motif.motif, [(row.file, list(row.image)) for row in motif.rows]) for motif in motifs] == \
+        [(motif.motif, [(row.file, list(row.image)) for row in motif.rows]) for motif in expected]
+    assert all(isinstance(row.image, memoryview) for motif in motifs for row in motif.rows)
+    # and the cache can be loaded by its own path
+    assert domains(load_motifs(cache_path(image))) == domains(expected)
@@ -0,0 +1,60 @@
+import os, sqlite3, subprocess, sys
+import pytest
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPOSITORY, 'scripts', 'make', 'make_corpus.py')
+
+def make_document(path, vertices, colors=('red',)):
+    if os.path.exists(path): os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE vertex (identifier integer primary key)")
+    connection.execute(f"CREATE TABLE color (id integer, value text{', extra text' if len(colors) > 1 else ''})")
+    connection.executemany("INSERT INTO vertex VALUES (?)", [(i,) for i in range(vertices)])
+    connection.executemany(
+        f"INSERT INTO color VALUES (?{', ?' * len(colors)})", [(i, *colors) for i in range(vertices)]
+    )
+    connection.commit()
+    connection.close()
+
+def merge(tmp_path, check=True):
+    return subprocess.run(
+        [sys.executable, SCRIPT, '--db-directory', str(tmp_path / 'db'), '--dataset', 'ds', '--output', str(tmp_path / 'corpus.db')],
+        cwd=tmp_path, capture_output=True, text=True, check=check
+    )
+
+def counts(tmp_path, table):
+    connection = sqlite3.connect(tmp_path / 'corpus.db')
+    try:
+        return dict(connection.execute(f"SELECT document, count(*) FROM {table} GROUP BY document"))
+    finally:
+        connection.close()
+
+@pytest.fixture
+def dataset(tmp_path):
+    os.makedirs(tmp_path / 'db' / 'ds')
+    for i in range(3):
+        make_document(str(tmp_path / 'db' / 'ds' / f'{i}.db'), vertices=5)
+    return tmp_path / 'db' / 'ds'
+
+def test_merge_is_incremental(tmp_path, dataset):
+    merge(tmp_path)
+    assert sorted(counts(tmp_path, 'vertex').values()) == [5, 5, 5]
+    # nothing is left behind in the working directory but the corpus itself
+    assert sorted(os.listdir(tmp_path)) == ['corpus.db', 'db']
+
+    make_document(str(dataset / '1.db'), vertices=7)
+    os.remove(dataset / '2.db')
+    assert '1 ingested, 1 unchanged, 1 removed' in merge(tmp_path).stderr
+    assert sorted(counts(tmp_path, 'vertex').values()) == [5, 7]
+
+# a document that fails part way through leaves the corpus (and its bookkeeping) as it was
+def test_failed_ingest_rolls_back(tmp_path, dataset):
+    merge(tmp_path)
+    make_document(str(dataset / '1.db'), vertices=8, colors=('red', 'bright'))
+    assert merge(tmp_path, check=False).returncode != 0
+    assert sorted(counts(tmp_path, 'vertex').values()) == [5, 5, 5]
+
+    make_document(str(dataset / '1.db'), vertices=8)
+    merge(tmp_path)
+    assert counts(tmp_path, 'vertex')[str(dataset / '1.db')] == 8
+    assert counts(tmp_path, 'color')[str(dataset / '1.db')] == 8
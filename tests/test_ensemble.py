@@ -0,0 +1,123 @@
+import pytest
+from analysis.motif import Motif, Row
+from analysis.synthetic import synthetic_image
+from analysis.ensemble import Disjunction, Count, MostSpecific, MajorityVote
+import analysis.ensemble.ensemble as ensemble_module
+import analysis.ensemble.frontier as frontier_module
+import analysis.ensemble.index as index_module
+
+def synthetic_motifs(**parameters):
+    return [Motif.of_json(motif) for motif in synthetic_image(**parameters)]
+
+# every full pass over a list of motifs goes through index, so count how many motifs each call is given
+@pytest.fixture
+def indexed(monkeypatch):
+    sizes, original = [], index_module.index
+    def counting(motifs):
+        motifs = list(motifs)
+        sizes.append(len(motifs))
+        return original(motifs)
+    monkeypatch.setattr(index_module, 'index', counting)
+    monkeypatch.setattr(ensemble_module, 'index', counting)
+    monkeypatch.setattr(frontier_module, 'index_motifs', counting)
+    return sizes
+
+@pytest.mark.parametrize('cls', [Disjunction, Count, MostSpecific, MajorityVote])
+def test_filter_matches_rebuilding(cls):
+    motifs = synthetic_motifs(motifs=400, values=200, noise=0.1, seed=1)
+    ensemble = cls(motifs)
+    # drop a few frontier motifs, so some motifs below them are promoted
+    dropped = set(ensemble.relevant(frontier=True)[:5]) if cls is not Disjunction else set(motifs[:5])
+    for step in range(3):
+        ensemble = ensemble.filter(lambda motif: motif not in dropped)
+        rebuilt = cls(ensemble.motifs)
+        assert ensemble._index == rebuilt._index
+        if cls is not Disjunction:
+            assert ensemble._frontier == rebuilt._frontier
+            assert ensemble._frontier_index == rebuilt._frontier_index
+            assert ensemble.domain() == rebuilt.domain()
+        dropped = set(ensemble.motifs[step::50])
+
+@pytest.mark.parametrize('cls', [Disjunction, Count])
+def test_filter_only_indexes_what_changed(cls, indexed):
+    motifs = synthetic_motifs(motifs=2000, values=200, noise=0.1, seed=2)
+    ensemble = cls(motifs)
+    dropped = set(motifs[::200])
+    del indexed[:]
+    filtered = ensemble.filter(lambda motif: motif not in dropped)
+
+    promoted = set(getattr(filtered, '_frontier', ())) - set(getattr(ensemble, '_frontier', ()))
+    assert sum(indexed) <= 2 * len(dropped) + len(promoted)
+    assert len(filtered.motifs) == len(motifs) - len(dropped)
+
+def motif_over(name, values):
+    return Motif(name, [Row('file', sorted(values))])
+
+# promoted motifs take the place a rebuild would give them among equally-sized frontier motifs, in the frontier
+# and in every frontier index list
+@pytest.mark.parametrize('cls', [Count, MostSpecific])
+def test_filter_keeps_rebuild_order(cls):
+    below = motif_over('below', {1, 2, 9})
+    beside = motif_over('beside', {4, 5, 9})
+    above = motif_over('above', {1, 2, 9, 10})
+    ensemble = cls([below, beside, above]).filter(lambda motif: motif is not above)
+    rebuilt = cls([below, beside])
+    assert ensemble._frontier == rebuilt._frontier == [below, beside]
+    assert ensemble._frontier_index == rebuilt._frontier_index
+
+# lots of equally-sized motifs, so the order of ties matters throughout
+@pytest.mark.parametrize('cls', [Count, MajorityVote])
+def test_filter_keeps_rebuild_order_among_ties(cls):
+    motifs = synthetic_motifs(motifs=600, values=40, noise=0.0, seed=7)
+    ensemble = cls(motifs)
+    for step in range(4):
+        dropped = set(ensemble.relevant(frontier=True)[step::3])
+        ensemble = ensemble.filter(lambda motif: motif not in dropped)
+        rebuilt = cls(ensemble.motifs)
+        assert [motif.motif for motif in ensemble._frontier] == [motif.motif for motif in rebuilt._frontier]
+        assert ensemble._frontier_index == rebuilt._frontier_index
+
+# an ensemble may be filtered more than once - a shared one keeps working, and a filtered one falls back to
+# rebuilding once its lattice has been handed on
+def test_filter_twice():
+    motifs = synthetic_motifs(motifs=400, values=200, noise=0.1, seed=8)
+    shared = Count(motifs)
+    for _ in range(2):
+        first = shared.filter(lambda motif: motif not in set(shared.relevant(frontier=True)[:5]))
+        for kept in (first.motifs[::2], first.motifs[1::2]):
+            keep = set(kept)
+            again = first.filter(lambda motif: motif in keep)
+            rebuilt = Count(again.motifs)
+            assert again._frontier == rebuilt._frontier
+            assert again._frontier_index == rebuilt._frontier_index
+
+# ranking through the index adds up exactly the confidences a scan over every relevant motif would
+@pytest.mark.parametrize('cls', [Count, MostSpecific, MajorityVote])
+def test_rank_matches_scan(cls):
+    motifs = synthetic_motifs(motifs=300, values=150, noise=0.1, seed=11)
+    ensemble = cls(motifs)
+    for frontier in (False, True):
+        relevant = ensemble.relevant(frontier=frontier)
+        for value in sorted(ensemble.domain())[::7]:
+            expected = 0.0
+            for motif in relevant:
+                if value in motif: expected += ensemble.confidence(motif)
+            assert ensemble.rank(value, frontier=frontier) == expected
+            assert ensemble.classify(value, frontier=frontier) == (expected > ensemble._default_threshold)
+
+def test_disjunction_matches_scan():
+    motifs = synthetic_motifs(motifs=300, values=150, noise=0.1, seed=11)
+    ensemble = Disjunction(motifs)
+    for value in range(0, 400, 3):
+        assert ensemble.classify(value) == any(value in motif for motif in motifs)
+
+# top_k's heap over count buckets picks exactly what sorting every ranking would
+@pytest.mark.parametrize('cls', [Count, MostSpecific, MajorityVote])
+@pytest.mark.parametrize('k', [0, 1, 10, 100, 10000])
+def test_top_k_matches_full_sort(cls, k):
+    motifs = synthetic_motifs(motifs=300, values=150, noise=0.1, seed=16)
+    ensemble = cls(motifs)
+    for frontier in (False, True):
+        relevant = ensemble._frontier_index if frontier else ensemble._index
+        ranked = sorted(((ensemble.rank(value, frontier=frontier), value) for value in relevant), reverse=True)
+        assert ensemble.top_k(k, frontier=frontier) == [(value, ranking) for ranking, value in ranked[:k]]
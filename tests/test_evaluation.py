@@ -0,0 +1,94 @@
+import math
+import pytest
+from analysis.motif import Motif
+from analysis.synthetic import synthetic_image
+from analysis.interner import INTERNER
+from analysis.ensemble import Count, MostSpecific, MajorityVote
+from analysis.evaluation import PRCurve, prc, performance_statistics
+
+def synthetic_motifs(**parameters):
+    return [Motif.of_json(motif) for motif in synthetic_image(**parameters)]
+
+# the curve as prc used to build it, selecting one value at a time in ranking order
+def reference_prc(ensemble, ground_truth, frontier=False):
+    ranking = [(v, ensemble.rank(v, frontier=frontier)) for v in ensemble.domain()]
+    ranking.sort(key=lambda p: p[-1], reverse=True)
+    selected, result = set(), []
+    for value, ranking in ranking:
+        selected.add(value)
+        try: precision, recall, _ = performance_statistics(selected, ground_truth, beta=1)
+        except ZeroDivisionError: precision, recall = 0, 0
+        result.append((ranking, value, precision, recall, value in ground_truth))
+    return result
+
+@pytest.fixture(scope='module')
+def motifs():
+    return synthetic_motifs(motifs=300, values=150, noise=0.1, seed=13)
+
+@pytest.mark.parametrize('cls', [Count, MostSpecific, MajorityVote])
+@pytest.mark.parametrize('frontier', [False, True])
+def test_curve_matches_reference(motifs, cls, frontier):
+    ensemble = cls(motifs)
+    ground_truth = set(sorted(ensemble.domain())[::3])
+    expected = reference_prc(ensemble, ground_truth, frontier=frontier)
+    curve = PRCurve.of_ensemble(ensemble, ground_truth, frontier=frontier)
+
+    # the same values with the same rankings, in ranking order
+    assert len(curve) == len(expected)
+    assert curve.scores.tolist() == [ranking for ranking, *_ in expected]
+    assert sorted(zip(curve.scores.tolist(), curve.values.tolist())) == sorted((r, v) for r, v, *_ in expected)
+    assert curve.gt.tolist() == [value in ground_truth for value in curve.values.tolist()]
+
+    # values tied on ranking are selected together, so every one of them shares the statistics the reference
+    # only reaches after the last of them
+    last = {}
+    for ranking, _, precision, recall, _ in expected:
+        last[ranking] = (precision, recall)
+    assert list(curve.points()) == [(ranking, *last[ranking]) for ranking in curve.thresholds.tolist()]
+    for ranking, precision, recall in zip(curve.scores.tolist(), curve.precision.tolist(), curve.recall.tolist()):
+        assert (precision, recall) == last[ranking]
+
+    # average precision as a step sum, and area under the curve as trapezoids from the first point
+    points = list(last.values())
+    average_precision, auc, previous = 0.0, 0.0, (points[0][0], 0.0)
+    for precision, recall in points:
+        average_precision += (recall - previous[1]) * precision
+        auc += (recall - previous[1]) * (precision + previous[0]) / 2
+        previous = (precision, recall)
+    assert curve.average_precision == pytest.approx(average_precision)
+    assert curve.auc == pytest.approx(auc)
+
+# with no ties, rows come out exactly as the old prc wrote them
+def test_rows_match_reference_without_ties(motifs):
+    ensemble = MostSpecific(motifs)
+    ground_truth = set(sorted(ensemble.domain())[::4])
+    values = sorted(ensemble.domain())
+    scores = [float(i) for i in range(len(values))]
+    curve = PRCurve(values, scores, ground_truth)
+    selected, expected = set(), []
+    for score, value in sorted(zip(scores, values), reverse=True):
+        selected.add(value)
+        try: precision, recall, _ = performance_statistics(selected, ground_truth)
+        except ZeroDivisionError: precision, recall = 0, 0
+        expected.append({'ranking' : score, 'value' : INTERNER.identifier(value), 'precision' : precision,
+            'recall' : recall, 'gt' : value in ground_truth})
+    assert list(curve) == expected
+    assert prc(ensemble, ground_truth) == list(PRCurve.of_ensemble(ensemble, ground_truth))
+
+def test_summary(motifs):
+    ensemble = Count(motifs)
+    ground_truth = set(sorted(ensemble.domain())[::3])
+    curve = PRCurve.of_ensemble(ensemble, ground_truth)
+    summary = curve.summary()
+    points = list(curve.points())
+    f1 = [2 * p * r / (p + r) if p + r > 0 else 0.0 for _, p, r in points]
+    assert summary['best-f1'] == pytest.approx(max(f1))
+    for level in (0.1, 0.5, 1.0):
+        reached = [p for _, p, r in points if r >= level - 1e-12]
+        assert summary[f"precision-at-{level:g}"] == (max(reached) if reached else 0.0)
+
+def test_empty_curve():
+    curve = PRCurve([], [], set())
+    assert len(curve) == 0 and list(curve) == []
+    assert curve.auc == 0.0 and curve.average_precision == 0.0
+    assert math.isnan(curve.summary()['best-f1-threshold'])
@@ -0,0 +1,57 @@
+import csv
+import pytest
+from analysis.motif import Motif
+from analysis.synthetic import synthetic_image, synthetic_ground_truth
+from analysis.utility import load_ground_truth
+from analysis.ensemble import Count
+from analysis.active import Active
+from analysis.evaluation import prc_curve, summary_fields
+from analysis.experiment import evaluate_active_prc
+
+PARAMETERS = {'files' : 4, 'values' : 100, 'seed' : 17}
+
+@pytest.fixture(scope='module')
+def inputs():
+    motifs = [Motif.of_json(motif) for motif in synthetic_image(motifs=200, noise=0.1, **PARAMETERS)]
+    gt, _ = load_ground_truth(synthetic_ground_truth(**PARAMETERS))
+    return Count(motifs), gt
+
+def read(filename):
+    with open(filename) as f:
+        return list(csv.DictReader(f))
+
+# summary mode writes one row per step, summarizing the curve the full mode would have written at that step
+@pytest.mark.parametrize('frontier', [False, True])
+def test_summary_mode(tmp_path, inputs, frontier):
+    ensemble, gt = inputs
+    full, summary, curve = (str(tmp_path / name) for name in ('full.csv', 'summary.csv', 'curve.csv'))
+    evaluate_active_prc(ensemble, gt, full, learning_steps=4, frontier=frontier)
+    evaluate_active_prc(ensemble, gt, summary, learning_steps=4, frontier=frontier, summary=True, curve=curve)
+    assert read(curve) == read(full)
+
+    rows = read(summary)
+    assert list(rows[0].keys()) == ['learning-step', 'ensemble-ratio'] + summary_fields()
+    active = Active(ensemble)
+    for step, row in enumerate(rows):
+        assert int(row['learning-step']) == step
+        expected = prc_curve(active.ensemble, gt, frontier=frontier).summary()
+        for field in summary_fields():
+            assert float(row[field]) == pytest.approx(expected[field], nan_ok=True)
+        split = active.candidate_split(frontier=frontier)
+        active = active.split_on(split, split in gt)
+    assert len(rows) == 4
+
+# an .npz output holds the same columns a csv would, and loads into the same frame
+def test_columnar_matches_csv(tmp_path, inputs):
+    from analysis.results import read_columns
+    from analysis.utility import load_prc
+    ensemble, gt = inputs
+    for suffix in ('.csv', '.npz'):
+        evaluate_active_prc(ensemble, gt, str(tmp_path / f'run{suffix}'), learning_steps=3)
+    columns = read_columns(str(tmp_path / 'run.npz'))
+    assert list(columns) == ['learning-step', 'ensemble-ratio', 'precision', 'recall', 'ranking', 'gt', 'value']
+    columnar, text = load_prc(str(tmp_path / 'run.npz')), load_prc(str(tmp_path / 'run.csv'))
+    assert list(columnar.columns) == list(text.columns)
+    for column in columnar.columns:
+        if column == 'tag': continue
+        assert columnar[column].tolist() == pytest.approx(text[column].tolist())
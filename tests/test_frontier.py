@@ -0,0 +1,43 @@
+import pytest
+from analysis.motif import Motif, Row
+from analysis.synthetic import synthetic_image
+from analysis.ensemble.frontier import frontier, lt, Lattice
+
+def synthetic_motifs(**parameters):
+    return [Motif.of_json(motif) for motif in synthetic_image(**parameters)]
+
+# the frontier as it used to be computed, checking every pair
+def quadratic_frontier(motifs):
+    motifs = sorted(motifs, key=lambda m: len(m.domain()), reverse=True)
+    return [motif for motif in motifs if not any(
+        motif.domain() != other.domain() and lt(motif, other) for other in motifs
+    )]
+
+@pytest.fixture(params=[1, 2, 3])
+def motifs(request):
+    motifs = synthetic_motifs(motifs=300, values=100, noise=0.1, seed=request.param)
+    # duplicated and empty domains are on the frontier unless something strictly contains them
+    return motifs + [Motif(motif.motif, list(motif.rows)) for motif in motifs[::40]] + [Motif({'empty' : 0}, [])]
+
+def test_frontier_matches_quadratic(motifs):
+    expected = quadratic_frontier(motifs)
+    assert frontier(motifs) == expected
+    assert Lattice.of_motifs(motifs).frontier == expected
+
+def test_lattice_relations(motifs):
+    lattice = Lattice.of_motifs(motifs)
+    on_frontier = set(lattice.frontier)
+    for motif in motifs:
+        above = [other for other in lattice.frontier if lt(motif, other)]
+        if motif in on_frontier:
+            assert not above
+            assert set(lattice._dominated[motif]) == {other for other in motifs if lt(other, motif)}
+        else:
+            assert set(lattice._dominators[motif]) == set(above)
+    for value, capturing in lattice.frontier_index.items():
+        assert capturing == [motif for motif in lattice.frontier if value in motif.domain()]
+
+def test_empty_domain_is_dominated():
+    empty, other = Motif('empty', []), Motif('other', [Row('file', [1])])
+    assert frontier([empty, other]) == [other]
+    assert frontier([empty]) == [empty]
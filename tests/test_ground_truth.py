@@ -0,0 +1,50 @@
+import json, os, sqlite3, subprocess, sys
+import pytest
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPOSITORY, 'scripts', 'make', 'make_ground_truth.py')
+SQL = "SELECT identifier FROM vertex WHERE identifier % 3 = 0"
+
+@pytest.fixture
+def experiment(tmp_path):
+    os.makedirs(tmp_path / 'db' / 'ds')
+    for i in range(12):
+        connection = sqlite3.connect(tmp_path / 'db' / 'ds' / f'{i:02}.db')
+        connection.execute("CREATE TABLE vertex (identifier integer primary key)")
+        connection.executemany("INSERT INTO vertex VALUES (?)", [(j,) for j in range(i + 2)])
+        connection.commit()
+        connection.close()
+    filename = tmp_path / 'experiment.json'
+    filename.write_text(json.dumps({'ground-truth' : {'kind' : 'sql', 'dataset' : 'ds', 'sql' : SQL}}))
+    return filename
+
+def make(tmp_path, experiment, output, *options):
+    subprocess.run(
+        [sys.executable, SCRIPT, '--db-directory', str(tmp_path / 'db'), '--experiment', str(experiment),
+            '--output', str(tmp_path / output), *options],
+        capture_output=True, text=True, check=True
+    )
+    with open(tmp_path / output) as f:
+        return json.load(f)
+
+# fanning documents out over a pool changes nothing about the output, which stays in directory order
+def test_parallel_matches_serial(tmp_path, experiment):
+    serial = make(tmp_path, experiment, 'serial.json', '--timings', str(tmp_path / 'timings.csv'))
+    parallel = make(tmp_path, experiment, 'parallel.json', '--jobs', '3')
+    assert parallel == serial
+    assert [os.path.basename(entry['file']) for entry in serial] == [f'{i:02}.db' for i in range(12)]
+    for i, entry in enumerate(serial):
+        assert entry['example'] == [j for j in range(i + 2) if j % 3 == 0]
+    with open(tmp_path / 'timings.csv') as f:
+        assert len(f.read().splitlines()) == 13
+
+# the same sql run once over a merged corpus finds what it finds in each document
+def test_corpus_matches_documents(tmp_path, experiment):
+    subprocess.run(
+        [sys.executable, os.path.join(REPOSITORY, 'scripts', 'make', 'make_corpus.py'), '--db-directory', str(tmp_path / 'db'),
+            '--dataset', 'ds', '--output', str(tmp_path / 'corpus.db')],
+        capture_output=True, text=True, check=True
+    )
+    documents = make(tmp_path, experiment, 'documents.json')
+    corpus = make(tmp_path, experiment, 'corpus.json', '--corpus', str(tmp_path / 'corpus.db'))
+    assert [entry['example'] for entry in corpus] == [entry['example'] for entry in documents]
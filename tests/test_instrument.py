@@ -0,0 +1,69 @@
+import json, os, subprocess, sys, tracemalloc
+import pytest
+import analysis.instrument as instrument
+from analysis.instrument import Profiler, stage, instrumented
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def profiler(monkeypatch):
+    profiler = Profiler()
+    monkeypatch.setattr(instrument, 'PROFILER', profiler)
+    return profiler
+
+@instrumented('inner')
+def allocate(size):
+    return bytearray(size)
+
+def test_disabled_records_nothing(profiler):
+    with stage('outer'):
+        allocate(10)
+    assert profiler.events == [] and profiler.stages == {}
+
+def test_nested_stages(profiler):
+    profiler.enabled = True
+    with stage('outer'):
+        for _ in range(3): allocate(10)
+    assert [(event['stage'], event['depth']) for event in profiler.events] == [('inner', 1)] * 3 + [('outer', 0)]
+    assert profiler.stages['inner']['calls'] == 3 and profiler.stages['outer']['calls'] == 1
+    assert profiler.stages['outer']['seconds'] >= profiler.stages['inner']['seconds']
+    assert 'inner' in profiler.summary()
+
+# an inner stage's peak counts towards the stage around it, even once its memory is freed
+def test_memory_peaks(profiler):
+    profiler.enabled, profiler.memory = True, True
+    tracemalloc.start()
+    try:
+        with stage('outer'):
+            allocate(1 << 22)
+            allocate(1 << 10)
+    finally:
+        tracemalloc.stop()
+    peaks = [event['peak-bytes'] for event in profiler.events]
+    assert peaks[0] >= 1 << 22 and peaks[1] < 1 << 22
+    assert profiler.stages['outer']['peak-bytes'] >= 1 << 22
+
+def test_drain_and_merge(profiler):
+    profiler.enabled = True
+    allocate(10)
+    events, stages = profiler.drain()
+    assert profiler.events == [] and profiler.stages == {}
+    allocate(10)
+    profiler.merge(events, stages, process=1234)
+    assert profiler.stages['inner']['calls'] == 2
+    assert [event.get('process') for event in profiler.events] == [None, 1234]
+
+# scripts are profiled by setting MOTIFS_PROFILE, and write the trace at exit
+def test_environment(tmp_path):
+    trace = tmp_path / 'trace.json'
+    result = subprocess.run(
+        [sys.executable, '-c', 'from analysis.ensemble import Count\nfrom analysis.motif import Motif, Row\n'
+            'Count([Motif(0, [Row("f", [1, 2])])]).rank_all()'],
+        cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY, MOTIFS_PROFILE=str(trace)),
+        capture_output=True, text=True, check=True
+    )
+    with open(trace) as f:
+        recorded = json.load(f)
+    assert recorded['memory'] is True
+    assert {'frontier', 'rank_all'} <= recorded['stages'].keys()
+    assert 'rank_all' in result.stderr
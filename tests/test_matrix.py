@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from analysis.motif import Motif
+from analysis.synthetic import synthetic_image
+from analysis.ensemble import Count, MostSpecific, MajorityVote, IncidenceMatrix
+
+def synthetic_motifs(**parameters):
+    return [Motif.of_json(motif) for motif in synthetic_image(**parameters)]
+
+@pytest.fixture(scope='module')
+def motifs():
+    return synthetic_motifs(motifs=300, values=150, noise=0.1, seed=12)
+
+def test_incidence(motifs):
+    matrix = IncidenceMatrix(motifs)
+    assert matrix.shape == (len(motifs), len(matrix.values))
+    assert list(matrix.sizes()) == [len(motif.domain()) for motif in motifs]
+    columns = {value : column for column, value in enumerate(matrix.values.tolist())}
+    dense = matrix.matrix.toarray()
+    for row, motif in enumerate(motifs[::17]):
+        expected = np.zeros(len(columns))
+        expected[[columns[value] for value in motif.domain()]] = 1
+        assert (dense[row * 17] == expected).all()
+
+# restricted rows keep the parent's columns, so scores line up with the same values
+def test_restrict_keeps_columns(motifs):
+    matrix = IncidenceMatrix(motifs)
+    subset = motifs[::3]
+    restricted = matrix.restrict(subset)
+    assert (restricted.values == matrix.values).all()
+    assert (restricted.matrix.toarray() == matrix.matrix.toarray()[::3]).all()
+
+@pytest.mark.parametrize('cls', [Count, MostSpecific, MajorityVote])
+def test_rank_all_matches_rank(motifs, cls):
+    ensemble = cls(motifs)
+    for frontier in (False, True):
+        values, scores = ensemble.rank_all(frontier=frontier)
+        ranked = dict(zip(values.tolist(), scores.tolist()))
+        assert len(values) == len(ensemble._index)
+        for value in ensemble._index:
+            assert ranked.get(value, 0.0) == pytest.approx(ensemble.rank(value, frontier=frontier))
@@ -0,0 +1,91 @@
+import io, json
+from array import array
+import pytest
+from analysis.interner import Interner, INTERNER
+from analysis.motif import Motif, Row, iter_json_list, load_motifs, unique_motifs
+from analysis.synthetic import write_image
+
+def test_interner_keeps_files_apart():
+    interner = Interner()
+    first, second = interner.intern('a.db', 7), interner.intern('b.db', 7)
+    assert first != second
+    assert interner.intern('a.db', 7) == first
+    assert interner.lookup(first) == ('a.db', 7) and interner.lookup(second) == ('b.db', 7)
+    assert list(interner.intern_all(interner.file('a.db'), [7, 8, 7])) == [first, first + 2, first]
+    assert interner.identifiers([first, second]) == [7, 7]
+    assert len(interner) == 3
+
+def test_interner_find_never_interns():
+    interner = Interner()
+    interner.intern('a.db', 1)
+    assert interner.find('a.db', 1) == 0
+    assert interner.find('a.db', 2) is None
+    assert interner.find('c.db', 1) is None
+    assert len(interner) == 1 and interner.files == ['a.db']
+
+# identifiers too big for 32 bits still pack to distinct keys
+def test_interner_large_identifiers():
+    interner = Interner()
+    keys = {interner.intern('a.db', identifier) for identifier in (1, 1 << 33, (1 << 33) + 1)}
+    assert len(keys) == 3
+
+def test_row_is_sorted_and_matches_by_file():
+    row = Row('rows-a.db', [5, 3, 5, 1])
+    assert list(row.image) == [1, 3, 5] and len(row) == 3
+    assert INTERNER.intern('rows-a.db', 3) in row
+    assert INTERNER.intern('rows-b.db', 3) not in row
+    assert INTERNER.intern('rows-a.db', 4) not in row
+    # arrays are taken as already sorted, and shared rather than copied
+    image = array('q', [2, 4])
+    assert Row('rows-a.db', image).image is image
+
+def test_motif_domain():
+    motif = Motif({'m' : 0}, [Row('domain-a.db', [1, 2]), Row('domain-b.db', [2])])
+    expected = {INTERNER.intern('domain-a.db', 1), INTERNER.intern('domain-a.db', 2), INTERNER.intern('domain-b.db', 2)}
+    assert motif.domain() == expected
+    assert motif.domain() is motif.domain()
+    assert all(value in motif for value in expected)
+    assert Motif.of_json({'motif' : {'m' : 0}, 'images' : [{'file' : 'domain-a.db', 'image' : [2, 1]}]}).domain() \
+        == expected - {INTERNER.intern('domain-b.db', 2)}
+
+# reading in chunks far smaller than an element must give what json.load would
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_iter_json_list_matches_json_load(chunk_size):
+    elements = [{'motif' : i, 'images' : [{'file' : 'f,]"[', 'image' : list(range(i))}]} for i in range(30)]
+    text = ' \n[ ' + ',\n  '.join(json.dumps(element) for element in elements) + ' ]\n'
+    assert list(iter_json_list(io.StringIO(text), chunk_size=chunk_size)) == elements
+    assert list(iter_json_list(io.StringIO('[]'), chunk_size=chunk_size)) == []
+
+@pytest.mark.parametrize('text', ['{"motif": 1}', '[{"motif": 1}, {"motif"', '[1, 2'])
+def test_iter_json_list_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        list(iter_json_list(io.StringIO(text), chunk_size=4))
+
+def test_load_motifs_streams_like_json_load(tmp_path):
+    filename = str(tmp_path / 'image.json')
+    write_image(filename, motifs=80, files=3, values=60, seed=14)
+    with open(filename) as f:
+        expected = [Motif.of_json(motif) for motif in json.load(f)]
+    loaded = load_motifs(filename)
+    assert [(motif.motif, motif.domain()) for motif in loaded] == [(motif.motif, motif.domain()) for motif in expected]
+    assert [motif.motif for motif in load_motifs(filename, max_rows=5)] == [motif.motif for motif in expected[:5]]
+    odd = load_motifs(filename, predicate=lambda motif: motif.motif['synthetic'] % 2 == 1)
+    assert [motif.motif for motif in odd] == [motif.motif for motif in expected if motif.motif['synthetic'] % 2 == 1]
+
+# the first motif with each image survives, in order, standing in for every motif sharing its image
+def test_unique_motifs(tmp_path):
+    filename = str(tmp_path / 'image.json')
+    write_image(filename, motifs=120, files=2, values=40, noise=0.0, seed=15)
+    motifs = load_motifs(filename)
+    expected, seen, counts = [], [], {}
+    for motif in motifs:
+        if motif.domain() not in seen:
+            seen.append(motif.domain())
+            expected.append(motif.motif)
+        counts[motif.domain()] = counts.get(motif.domain(), 0) + 1
+
+    unique = load_motifs(filename, unique=True)
+    assert [motif.motif for motif in unique] == expected
+    assert [motif.multiplicity for motif in unique] == [counts[motif.domain()] for motif in unique]
+    assert all(motif.multiplicity == 1 for motif in load_motifs(filename, unique=True, multiplicity=False))
+    assert sum(motif.multiplicity for motif in unique_motifs(unique)) == len(motifs)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from analysis.plotting import decimate_indices, decimate, Figure, render_all
+
+def curve(n, seed=0):
+    rng = np.random.default_rng(seed)
+    recall = np.sort(rng.random(n))
+    precision = rng.random(n)
+    return recall, precision
+
+def test_short_curves_are_kept_whole():
+    recall, precision = curve(100)
+    assert decimate_indices(recall, precision, max_points=100).tolist() == list(range(100))
+    assert decimate_indices(recall, precision, max_points=0).tolist() == list(range(100))
+
+# each bin keeps its first, last, highest and lowest points, so the shape of the curve survives
+def test_decimation_keeps_extremes():
+    recall, precision = curve(50000)
+    kept = decimate_indices(recall, precision, max_points=400)
+    assert len(kept) <= 400
+    assert kept.tolist() == sorted(set(kept.tolist()))
+    assert {0, len(recall) - 1, int(np.argmax(precision)), int(np.argmin(precision))} <= set(kept.tolist())
+    bins = np.clip(((recall - recall.min()) / ((recall.max() - recall.min()) / 100)).astype(np.int64), 0, 99)
+    for b in (0, 37, 99):
+        inside = np.flatnonzero(bins == b)
+        if len(inside):
+            assert inside[np.argmax(precision[inside])] in kept and inside[np.argmin(precision[inside])] in kept
+
+def test_decimate_each_curve():
+    pandas = pytest.importorskip('pandas')
+    frames = []
+    for step in range(3):
+        recall, precision = curve(5000, seed=step)
+        frames.append(pandas.DataFrame({'recall' : recall, 'precision' : precision, 'learning-step' : step}))
+    frame = pandas.concat(frames, ignore_index=True)
+    decimated = decimate(frame, by='learning-step', max_points=200)
+    counts = decimated['learning-step'].value_counts()
+    assert sorted(counts.index) == [0, 1, 2] and (counts <= 200).all()
+    assert decimated.index.is_monotonic_increasing
+
+# figures drawn over a pool come out the same as ones drawn in process
+def test_render_all(tmp_path):
+    pytest.importorskip('seaborn')
+    pandas = pytest.importorskip('pandas')
+    recall, precision = curve(3000)
+    results = tmp_path / 'results.csv'
+    pandas.DataFrame({'recall' : recall, 'precision' : precision, 'ranking' : 1.0, 'gt' : True, 'value' : 0}).to_csv(results)
+    figures = [Figure('prc', [str(results)], str(tmp_path / f'figure-{i}.png')) for i in range(3)]
+    assert sorted(figure.output for figure in render_all(figures, processes=2, max_points=500)) == \
+        sorted(figure.output for figure in figures)
+    assert all((tmp_path / f'figure-{i}.png').stat().st_size > 0 for i in range(3))
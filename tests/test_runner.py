@@ -0,0 +1,70 @@
+import json, os, subprocess, sys
+import pytest
+from analysis.synthetic import write_image, synthetic_ground_truth
+from analysis.experiment import job_of_string
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def inputs(tmp_path):
+    image, gt = str(tmp_path / 'image.json'), str(tmp_path / 'gt.json')
+    write_image(image, motifs=200, files=4, values=100, seed=0)
+    with open(gt, 'w') as f:
+        json.dump(synthetic_ground_truth(files=4, values=100, seed=0), f)
+    return image, gt
+
+def jobs(tmp_path, image, gt, suffix):
+    return [
+        {'mode' : 'active-prc', 'ensemble' : 'count', 'image' : image, 'ground-truth' : gt,
+            'output' : str(tmp_path / f'count-{suffix}.csv'), 'learning-steps' : 3},
+        {'mode' : 'active', 'ensemble' : 'disjunction', 'image' : image, 'ground-truth' : gt,
+            'output' : str(tmp_path / f'disjunction-{suffix}.csv'), 'learning-steps' : 3},
+    ]
+
+def run(tmp_path, job_list, *options):
+    job_file = tmp_path / 'jobs.json'
+    with open(job_file, 'w') as f:
+        json.dump(job_list, f)
+    return subprocess.run(
+        [sys.executable, '-m', 'analysis', '--job-file', str(job_file), *options],
+        cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY), capture_output=True, text=True, check=True
+    )
+
+def test_parallel_matches_serial(tmp_path, inputs):
+    serial, parallel = jobs(tmp_path, *inputs, 'serial'), jobs(tmp_path, *inputs, 'parallel')
+    run(tmp_path, serial)
+    run(tmp_path, parallel, '--jobs', '2')
+    for one, other in zip(serial, parallel):
+        with open(one['output']) as f, open(other['output']) as g:
+            assert f.read() == g.read()
+
+# pool workers never report at exit, so their stages have to make it back to the parent's trace
+def test_parallel_profile(tmp_path, inputs):
+    trace = tmp_path / 'trace.json'
+    result = run(tmp_path, jobs(tmp_path, *inputs, 'profiled'), '--jobs', '2', '--profile', str(trace))
+    with open(trace) as f:
+        recorded = json.load(f)
+    assert {'load_motifs', 'ensemble', 'rank_all'} <= recorded['stages'].keys()
+    assert recorded['stages']['ensemble']['calls'] == 2
+    assert all(event.get('process') is not None for event in recorded['events'] if event['stage'] == 'ensemble')
+    assert 'rank_all' in result.stderr
+
+def test_job_of_string_escapes():
+    job = job_of_string(r'mode=active,image=runs/a\,b.json,ground-truth=gt\\x.json,output=out=1.csv,learning-steps=2')
+    assert job.image == 'runs/a,b.json'
+    assert job.ground_truth == 'gt\\x.json'
+    assert job.output == 'out=1.csv'
+    assert job.learning_steps == 2
+    with pytest.raises(ValueError):
+        job_of_string('mode=active,image')
+
+# a path with a comma in it makes it through --job to the output file
+def test_job_with_comma(tmp_path, inputs):
+    image, gt = inputs
+    output = tmp_path / 'count,active.csv'
+    escaped = str(output).replace('\\', '\\\\').replace(',', '\\,')
+    subprocess.run(
+        [sys.executable, '-m', 'analysis', '--job', f'mode=active,ensemble=count,image={image},ground-truth={gt},output={escaped}'],
+        cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY), capture_output=True, text=True, check=True
+    )
+    assert output.exists()
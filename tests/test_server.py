@@ -0,0 +1,93 @@
+import json, threading
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+import pytest
+from analysis.motif import Motif
+from analysis.synthetic import synthetic_image
+from analysis.interner import INTERNER
+from analysis.active import Active
+from analysis.ensemble import Disjunction
+import analysis.server as server_module
+from analysis.server import EnsembleStore, serve
+
+@pytest.fixture(scope='module')
+def store():
+    store = EnsembleStore()
+    store.images['image'] = [Motif.of_json(motif) for motif in synthetic_image(motifs=300, values=100, seed=3)]
+    return store
+
+@pytest.fixture(scope='module')
+def address(store):
+    server = serve(store, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+def post(address, path, body):
+    connection = HTTPConnection(*address)
+    payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    connection.request('POST', path, body=payload, headers={'Content-Length': str(len(payload))})
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+def test_rank(address, store):
+    value = next(iter(store.images['image'][0].domain()))
+    status, body = post(address, '/rank', {'image': 'image', 'values': [list(INTERNER.lookup(value)), ['none', 0]]})
+    assert status == 200
+    assert body['results'][0] > 0 and body['results'][1] == 0.0
+
+@pytest.mark.parametrize('path, body', [
+    ('/nowhere', {}),
+    ('/rank', {'image': 'missing', 'values': []}),
+    ('/rank', {'image': 'image', 'ensemble': 'missing', 'values': []}),
+    ('/active/candidate', {'session': 'missing'}),
+])
+def test_not_found(address, path, body):
+    status, body = post(address, path, body)
+    assert status == 404
+    assert 'error' in body
+
+@pytest.mark.parametrize('body', [
+    {'values': []},
+    {'image': 'image', 'k': 'three'},
+    b'{not json',
+])
+def test_bad_request(address, body):
+    status, body = post(address, '/top_k' if isinstance(body, dict) and 'k' in body else '/rank', body)
+    assert status == 400
+    assert 'error' in body
+
+def test_internal_error(address, monkeypatch, capfd):
+    def failing(store, request):
+        return 1 / len(request)
+    monkeypatch.setitem(server_module.ROUTES, '/failing', failing)
+    status, body = post(address, '/failing', {})
+    assert status == 500
+    assert body['error'].startswith('ZeroDivisionError')
+    assert 'Traceback' in capfd.readouterr().err
+    # and the server keeps answering
+    assert post(address, '/rank', {'image': 'image', 'values': []}) == (200, {'results': []})
+
+# splits on one session from many threads at once must all land, in whatever order
+def test_concurrent_splits(address, store):
+    status, body = post(address, '/active/start', {'image': 'image'})
+    session = body['session']
+    values = sorted({value for motif in store.images['image'][:40] for value in motif.domain()})[:24]
+    splits = [(list(INTERNER.lookup(value)), i % 3 != 0) for i, value in enumerate(values)]
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(
+            lambda split: post(address, '/active/split', {'session': session, 'value': split[0], 'label': split[1]}),
+            splits
+        ))
+    assert all(status == 200 for status, _ in responses)
+
+    active = Active(Disjunction(store.images['image']))
+    for value, (_, label) in zip(values, splits):
+        active = active.split_on(value, label)
+    status, body = post(address, '/active/split', {'session': session, 'value': ['none', 0], 'label': True})
+    assert body['size'] == active.ensemble.size
+    post(address, '/active/end', {'session': session})
@@ -0,0 +1,55 @@
+import json, os, sqlite3
+import pytest
+from analysis.sql import Plan, evaluate_motifs, literal
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# motifs over the documents in tests/db, and the image SQL.ml's queries give for them - self-loops included,
+# which SQL.ml selects as "source AS v, target AS v" and so only constrains the source
+@pytest.fixture
+def recorded(monkeypatch):
+    monkeypatch.chdir(REPOSITORY)
+    with open('tests/sql-motifs.json') as f:
+        motifs = json.load(f)
+    with open('tests/sql-image.json') as f:
+        image = json.load(f)
+    return motifs, image
+
+def images(rows):
+    return [{row['file'] : sorted(row['image']) for row in motif['images']} for motif in rows]
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_matches_recorded_evaluation(recorded, processes):
+    motifs, image = recorded
+    files = sorted({row['file'] for motif in image for row in motif['images']})
+    rows = evaluate_motifs(motifs, files, processes=processes)
+    assert [row['motif'] for row in rows] == motifs
+    assert images(rows) == images(image)
+
+def test_self_loop_only_constrains_the_source(recorded):
+    connection = sqlite3.connect('tests/db/5.db')
+    motif = {'selector' : 0, 'structure' : {
+        'vertices' : [{'identifier' : 0, 'label' : []}],
+        'edges' : [{'source' : 0, 'label' : {'kind' : 'constant', 'constant' : 'CONTAINS'}, 'destination' : 0}]
+    }}
+    sources = sorted(row[0] for row in connection.execute("SELECT DISTINCT source FROM CONTAINS"))
+    assert Plan([motif]).evaluate('tests/db/5.db') == [sources]
+
+def test_motifs_equal_up_to_renaming_share_a_query():
+    def motif(selector, other):
+        return {'selector' : selector, 'structure' : {
+            'vertices' : [{'identifier' : selector, 'label' : [{'kind' : 'constant', 'attribute' : 'POS', 'value' : 'NNP'}]},
+                {'identifier' : other, 'label' : []}],
+            'edges' : [{'source' : other, 'label' : {'kind' : 'constant', 'constant' : 'CONTAINS'}, 'destination' : selector}]
+        }}
+    plan = Plan([motif(0, 1), motif(5, 3)])
+    assert len(plan.queries) == 1 and plan.motif_queries == [0, 0]
+
+def test_unconstrained_selector_selects_nothing():
+    motif = {'selector' : 7, 'structure' : {'vertices' : [], 'edges' : []}}
+    assert Plan([motif]).evaluate(os.path.join(REPOSITORY, 'tests/db/5.db')) == [[]]
+
+def test_literals_are_written_as_values_are():
+    assert literal("it's") == "'it''s'"
+    assert literal(3) == "3"
+    assert literal(None) == "NULL"
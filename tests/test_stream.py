@@ -0,0 +1,85 @@
+import json, subprocess, sys, threading, time
+import pytest
+from analysis.motif import load_motifs
+from analysis.synthetic import write_image
+from analysis.ensemble import Count, Disjunction
+from analysis.stream import StreamingImage, iter_records, read_stream
+
+# the lines ./evaluate --stream would write for an image
+def stream_lines(image):
+    files = []
+    for motif in image:
+        for row in motif['images']:
+            if row['file'] not in files: files.append(row['file'])
+    rows = {(j, row['file']) : row['image'] for j, motif in enumerate(image) for row in motif['images']}
+    lines = [json.dumps({'motif': j, 'definition': motif['motif']}) for j, motif in enumerate(image)]
+    for file in files:
+        lines += [json.dumps({'motif': j, 'file': file, 'image': rows.get((j, file), [])}) for j in range(len(image))]
+    return lines + [json.dumps({'done': len(files)})], files
+
+@pytest.fixture
+def image(tmp_path):
+    filename = tmp_path / 'image.json'
+    write_image(str(filename), motifs=150, files=3, values=80, seed=9)
+    with open(filename) as f:
+        lines, files = stream_lines(json.load(f))
+    return str(filename), lines, files
+
+def test_stream_matches_image(tmp_path, image):
+    filename, lines, files = image
+    stream = tmp_path / 'image.jsonl'
+    stream.write_text('\n'.join(lines) + '\n')
+    expected, streamed = load_motifs(filename), load_motifs(str(stream))
+    assert [motif.motif for motif in streamed] == [motif.motif for motif in expected]
+    assert [motif.domain() for motif in streamed] == [motif.domain() for motif in expected]
+    assert read_stream(str(stream)).files == files
+    for cls in (Count, Disjunction):
+        assert cls(streamed).domain() == cls(expected).domain()
+
+def test_stream_without_done_is_incomplete(tmp_path, image):
+    _, lines, _ = image
+    stream = tmp_path / 'image.jsonl'
+    stream.write_text('\n'.join(lines[:-1]) + '\n')
+    with pytest.raises(ValueError):
+        read_stream(str(stream))
+
+# a file being written is followed through partial lines until its done record
+def test_follow(tmp_path, image):
+    _, lines, files = image
+    stream = tmp_path / 'image.jsonl'
+    stream.write_text('')
+    data = '\n'.join(lines) + '\n'
+    def write():
+        with open(stream, 'a') as f:
+            for i in range(0, len(data), 997):
+                f.write(data[i:i + 997])
+                f.flush()
+                time.sleep(0.001)
+    writer = threading.Thread(target=write)
+    writer.start()
+    live = StreamingImage()
+    with open(stream) as f:
+        completed = list(live.consume(iter_records(f, follow=True, poll=0.001)))
+    writer.join()
+    assert completed == list(range(1, len(files) + 1))
+    assert live.done
+
+# a writer that dies, or goes quiet, without finishing the stream is given up on
+def test_follow_stops_when_writer_exits(tmp_path, image):
+    _, lines, _ = image
+    stream = tmp_path / 'image.jsonl'
+    stream.write_text('\n'.join(lines[:10]) + '\n')
+    writer = subprocess.Popen([sys.executable, '-c', 'pass'])
+    writer.wait()
+    with pytest.raises(ValueError):
+        read_stream(str(stream), follow=True, timeout=None, writer=writer)
+
+def test_follow_stops_when_idle(tmp_path, image):
+    _, lines, _ = image
+    stream = tmp_path / 'image.jsonl'
+    stream.write_text('\n'.join(lines[:10]) + '\n' + lines[10][:5])
+    start = time.monotonic()
+    with open(stream) as f:
+        records = list(iter_records(f, follow=True, poll=0.01, timeout=0.2))
+    assert len(records) == 10
+    assert time.monotonic() - start < 5
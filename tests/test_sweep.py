@@ -0,0 +1,54 @@
+import json, os, subprocess, sys
+import pytest
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPOSITORY, 'scripts', 'make', 'make_sweep.py')
+
+@pytest.fixture
+def setup(tmp_path):
+    for tool in ('synthesize', 'evaluate'):
+        (tmp_path / tool).write_text('#!/bin/sh\n')
+        (tmp_path / tool).chmod(0o755)
+    experiment = tmp_path / 'experiment.json'
+    experiment.write_text(json.dumps({
+        'ground-truth' : {'kind' : 'provided', 'labels' : []}, 'metadata' : {'name' : 'test'}, 'number-of-examples' : 3
+    }))
+    return tmp_path, experiment
+
+def dry_run(setup, *options):
+    tmp_path, experiment = setup
+    manifest = tmp_path / 'manifest.json'
+    result = subprocess.run(
+        [sys.executable, SCRIPT, '--experiment', str(experiment), '--cache', str(tmp_path / 'cache'),
+            '--synthesize', str(tmp_path / 'synthesize'), '--evaluate', str(tmp_path / 'evaluate'),
+            '--manifest', str(manifest), '--dry-run', *options],
+        cwd=tmp_path, capture_output=True, text=True, check=True
+    )
+    with open(manifest) as f:
+        return [line.split() for line in result.stdout.splitlines()], json.load(f)
+
+# grid points share every stage they have in common, and each artifact's path only depends on what went into it
+def test_dry_run_shares_stages(setup):
+    stages, manifest = dry_run(setup, '--seeds', '0', '1', '--number-of-examples', '2', '4')
+    names = [name for _, name, _ in stages]
+    assert names.count('ground-truth') == 1
+    assert names.count('problem') == 4 and names.count('image') == 4
+    assert names.count('results') == 8
+    assert len({point['ground-truth'] for point in manifest}) == 1
+    assert len({point['problem'] for point in manifest}) == 4
+    assert all(status == 'make' for status, _, _ in stages)
+
+    # a narrower sweep reuses the wider one's paths
+    _, narrower = dry_run(setup, '--seeds', '1', '--number-of-examples', '4')
+    assert narrower[0] in manifest
+
+# anything already made is cached, and what depends on it is still to make
+def test_dry_run_sees_cache(setup):
+    _, manifest = dry_run(setup)
+    ground_truth = manifest[0]['ground-truth']
+    os.makedirs(os.path.dirname(ground_truth))
+    with open(ground_truth, 'w') as f:
+        f.write('[]')
+    stages, _ = dry_run(setup)
+    assert {name : status for status, name, _ in stages}['ground-truth'] == 'cached'
+    assert {status for status, name, _ in stages if name != 'ground-truth'} == {'make'}
@@ -0,0 +1,50 @@
+import json, os, subprocess, sys
+from analysis.motif import Motif
+from analysis.ensemble.frontier import frontier
+from analysis.synthetic import synthetic_image, synthetic_ground_truth, write_image
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARAMETERS = {'motifs' : 200, 'files' : 6, 'values' : 300, 'rows' : 2, 'roots' : 4, 'density' : 0.2}
+
+def test_seeded(tmp_path):
+    assert list(synthetic_image(seed=1, **PARAMETERS)) == list(synthetic_image(seed=1, **PARAMETERS))
+    assert list(synthetic_image(seed=1, **PARAMETERS)) != list(synthetic_image(seed=2, **PARAMETERS))
+    write_image(str(tmp_path / 'image.json'), seed=1, **PARAMETERS)
+    with open(tmp_path / 'image.json') as f:
+        assert json.load(f) == list(synthetic_image(seed=1, **PARAMETERS))
+
+def test_shape():
+    motifs = list(synthetic_image(seed=3, noise=0.5, **PARAMETERS))
+    assert len(motifs) == PARAMETERS['motifs']
+    for motif in motifs:
+        assert len(motif['images']) == PARAMETERS['rows']
+        for row in motif['images']:
+            assert row['image'] == sorted(set(row['image']))
+            assert all(0 <= value < PARAMETERS['values'] for value in row['image'])
+            assert row['file'] in {f"synthetic/{i}.db" for i in range(PARAMETERS['files'])}
+
+# without noise every motif nests under its root, so the frontier has at most one image per root (motifs sharing
+# that image all sit on it) - and the ground truth is the first root, so some motifs nest inside it
+def test_nesting_and_ground_truth():
+    motifs = [Motif.of_json(motif) for motif in synthetic_image(seed=4, **PARAMETERS)]
+    assert len({motif.domain() for motif in frontier(motifs)}) <= PARAMETERS['roots']
+    truth = synthetic_ground_truth(seed=4, **PARAMETERS)
+    assert [entry['file'] for entry in truth] == [f"synthetic/{i}.db" for i in range(PARAMETERS['files'])]
+    covered = {(entry['file'], value) for entry in truth for value in entry['example']}
+    assert covered
+    images = [{(row.file, value) for row in motif.rows for value in row.image} for motif in motifs]
+    assert any(image and image <= covered for image in images)
+
+# the benchmark runs each scale's timing and memory passes in processes of their own, and records both
+def test_benchmark(tmp_path):
+    subprocess.run(
+        [sys.executable, os.path.join(REPOSITORY, 'scripts', 'benchmark', 'benchmark_analysis.py'), '--scales', 'small',
+            '--output-dir', str(tmp_path)],
+        cwd=REPOSITORY, env=dict(os.environ, PYTHONPATH=REPOSITORY), capture_output=True, text=True, check=True
+    )
+    [output] = os.listdir(tmp_path)
+    with open(tmp_path / output) as f:
+        recorded = json.load(f)
+    stages = recorded['results']['small']
+    assert ['generate', 'load_motifs', 'frontier', 'ensemble', 'rank', 'incidence', 'rank_all', 'prc'] == list(stages)[:8]
+    assert all(stage['seconds'] >= 0 and stage['peak-bytes'] is not None for stage in stages.values())